@@ -10,6 +10,7 @@
 import asyncio
 import importlib
 import sys
+import time
 
 from pyrogram import idle
 from pytgcalls.exceptions import NoActiveGroupCall
@@ -18,24 +19,103 @@ import config
 from config import BANNED_USERS
 from YukkiMusic import LOGGER, app, userbot
 from YukkiMusic.core.call import Yukki
+from YukkiMusic.core.http import http
+from YukkiMusic.core.mediacache import media_cache
+from YukkiMusic.core.shard import is_local, run_worker, serve
+from YukkiMusic.core.userbot import assistants
+from YukkiMusic.core.ytdl import extractor
 from YukkiMusic.plugins import ALL_MODULES
-from YukkiMusic.utils.database import get_banned_users, get_gbanned
+from YukkiMusic.utils.database import (get_banned_users, get_gbanned,
+                                       play_stats, prepare_top_tracks)
+from YukkiMusic.utils.database.settingscache import (prepare_chat_settings,
+                                                     settings_cache,
+                                                     wait_chat_settings)
 
 loop = asyncio.get_event_loop()
 
+startup = {}
+
+
+async def timed(phase, coro):
+    begin = time.monotonic()
+    try:
+        return await coro
+    finally:
+        startup[phase] = time.monotonic() - begin
+
+
+async def load_banned_users():
+    try:
+        users = await get_gbanned()
+        for user_id in users:
+            BANNED_USERS.add(user_id)
+        users = await get_banned_users()
+        for user_id in users:
+            BANNED_USERS.add(user_id)
+    except:
+        pass
+
+
+async def prepare_database():
+    # Workers of a sharded bot share one database, the first one prepares it.
+    if config.SHARD_ID in (None, 0):
+        try:
+            await prepare_top_tracks()
+        except Exception as e:
+            LOGGER("YukkiMusic").warning(
+                f"Failed to prepare the top tracks collection: {e}"
+            )
+        try:
+            await prepare_chat_settings()
+        except Exception as e:
+            LOGGER("YukkiMusic").warning(
+                f"Failed to prepare the chat settings collection: {e}"
+            )
+    else:
+        try:
+            migrated = await wait_chat_settings(config.STARTUP_TIMEOUT)
+        except Exception as e:
+            LOGGER("YukkiMusic").warning(f"Failed to check the chat settings: {e}")
+            migrated = False
+        if not migrated:
+            LOGGER("YukkiMusic").warning(
+                "Chat settings were not migrated by shard 0 in time, starting anyway."
+            )
+    if config.SETTINGS_PREFETCH_HOURS:
+        try:
+            loaded = await settings_cache.prefetch(
+                time.time() - config.SETTINGS_PREFETCH_HOURS * 3600
+            )
+            LOGGER("YukkiMusic").info(f"Loaded the settings of {loaded} chats.")
+        except Exception as e:
+            LOGGER("YukkiMusic").warning(
+                f"Failed to load chat settings: {e}"
+            )
+
+
+async def frontend():
+    await asyncio.wait_for(app.start(), config.STARTUP_TIMEOUT)
+    workers = [
+        asyncio.create_task(run_worker(shard))
+        for shard in range(config.SHARDS)
+    ]
+    LOGGER("YukkiMusic").info(
+        f"Yukki Music Bot Front-end Started with {config.SHARDS} Shards"
+    )
+    await idle()
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
 
 async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
+    if not any(config.STRING_SESSIONS):
         LOGGER("YukkiMusic").error(
             "No Assistant Clients Vars Defined!.. Exiting Process."
         )
         return
+    if config.SHARDS > 1 and config.SHARD_ID is None:
+        return await frontend()
     if (
         not config.SPOTIFY_CLIENT_ID
         and not config.SPOTIFY_CLIENT_SECRET
@@ -43,27 +123,47 @@ async def init():
         LOGGER("YukkiMusic").warning(
             "No Spotify Vars defined. Your bot won't be able to play spotify queries."
         )
-    try:
-        users = await get_gbanned()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-        users = await get_banned_users()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-    except:
-        pass
-    await app.start()
+    started = time.monotonic()
+    clients = asyncio.gather(
+        timed("Bot", asyncio.wait_for(app.start(), config.STARTUP_TIMEOUT)),
+        timed("Assistants", userbot.start()),
+        timed("Calls", Yukki.start()),
+        timed("yt-dlp Workers", extractor.start()),
+        timed("Banned Users", load_banned_users()),
+    )
+    database = asyncio.ensure_future(timed("Database", prepare_database()))
+    # Let the handshakes above go out before the imports hold the loop.
+    await asyncio.sleep(0)
+    # Handlers must not read chat settings before they are migrated.
+    await database
+    begin = time.monotonic()
     for all_module in ALL_MODULES:
         importlib.import_module("YukkiMusic.plugins" + all_module)
+    startup["Plugins"] = time.monotonic() - begin
     LOGGER("Yukkimusic.plugins").info(
         "Successfully Imported Modules "
     )
-    await userbot.start()
-    await Yukki.start()
-    try:
-        await Yukki.stream_call(
-            "http://docs.evostream.com/sample_content/assets/sintel1m720p.mp4"
+    await clients
+    if config.SHARD_ID is not None:
+        await serve(app, config.SHARD_ID)
+    for num in list(assistants):
+        if num not in Yukki.calls:
+            assistants.remove(num)
+    if not assistants:
+        LOGGER("YukkiMusic").error(
+            "No Assistant Client could be started!.. Exiting Process."
         )
+        sys.exit()
+    LOGGER("YukkiMusic").info(
+        "Startup Timings: "
+        + ", ".join(f"{phase} {took:.1f}s" for phase, took in startup.items())
+        + f", Total {time.monotonic() - started:.1f}s"
+    )
+    try:
+        if is_local(config.LOG_GROUP_ID):
+            await Yukki.stream_call(
+                "http://docs.evostream.com/sample_content/assets/sintel1m720p.mp4"
+            )
     except NoActiveGroupCall:
         LOGGER("YukkiMusic").error(
             "[ERROR] - \n\nPlease turn on your Logger Group's Voice Call. Make sure you never close/end voice call in your log group"
@@ -78,4 +178,8 @@ async def init():
 
 if __name__ == "__main__":
     loop.run_until_complete(init())
+    extractor.close()
+    media_cache.flush()
+    loop.run_until_complete(play_stats.close())
+    loop.run_until_complete(http.close())
     LOGGER("YukkiMusic").info("Stopping Yukki Music Bot! GoodBye")
@@ -16,6 +16,7 @@ from pyrogram.enums import ChatMemberStatus, ParseMode
 import config
 
 from ..logging import LOGGER
+from .shard import router
 
 
 class YukkiBot(Client):
@@ -31,12 +32,37 @@ class YukkiBot(Client):
             max_concurrent_transmissions=7,
         )
 
+    async def handle_updates(self, updates):
+        if config.SHARDS > 1:
+            if config.SHARD_ID is None:
+                return await router.route(updates)
+            # Shard workers only act on what the front-end forwards to them.
+            return
+        return await super().handle_updates(updates)
+
     async def start(self):
         await super().start()
         get_me = await self.get_me()
         self.username = get_me.username
         self.id = get_me.id
         self.mention = get_me.mention
+        # Shard workers log in with the same token, only the front-end
+        # announces the start and sets the commands.
+        if config.SHARD_ID is None:
+            await self._announce()
+        a = await self.get_chat_member(config.LOG_GROUP_ID, self.id)
+        if a.status != ChatMemberStatus.ADMINISTRATOR:
+            LOGGER(__name__).error(
+                "Please promote Bot as Admin in Logger Group"
+            )
+            sys.exit()
+        if get_me.last_name:
+            self.name = get_me.first_name + " " + get_me.last_name
+        else:
+            self.name = get_me.first_name
+        LOGGER(__name__).info(f"MusicBot Started as {self.name}")
+
+    async def _announce(self):
         try:
             await self.send_message(
                 config.LOG_GROUP_ID, "Bot Started"
@@ -65,19 +91,6 @@ class YukkiBot(Client):
                     )
             except:
                 pass
-        else:
-            pass
-        a = await self.get_chat_member(config.LOG_GROUP_ID, self.id)
-        if a.status != ChatMemberStatus.ADMINISTRATOR:
-            LOGGER(__name__).error(
-                "Please promote Bot as Admin in Logger Group"
-            )
-            sys.exit()
-        if get_me.last_name:
-            self.name = get_me.first_name + " " + get_me.last_name
-        else:
-            self.name = get_me.first_name
-        LOGGER(__name__).info(f"MusicBot Started as {self.name}")
 
 if sys.platform != "win32":
     uvloop.install()
@@ -8,12 +8,12 @@
 # All rights reserved.
 
 import asyncio
-from datetime import datetime, timedelta
 from typing import Union
 
 from pyrogram import Client
-from pyrogram.errors import (ChatAdminRequired,
+from pyrogram.errors import (ChatAdminRequired, FloodWait,
                              UserAlreadyParticipant,
+                             UserBannedInChannel,
                              UserNotParticipant)
 from pyrogram.types import InlineKeyboardMarkup
 from pyrogram.enums import ChatMemberStatus
@@ -23,35 +23,50 @@ from pytgcalls.exceptions import (AlreadyJoinedError,
                                   TelegramServerError)
 from pytgcalls.types import (JoinedGroupCallParticipant,
                              LeftGroupCallParticipant, Update)
-from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
+from pytgcalls.types.input_stream import AudioVideoPiped
 from pytgcalls.types.stream import StreamAudioEnded
 
 import config
 from strings import get_string
 from YukkiMusic import LOGGER, YouTube, app
+from YukkiMusic.core.participants import participants
 from YukkiMusic.misc import db
 from YukkiMusic.utils.database import (add_active_chat,
                                        add_active_video_chat,
-                                       get_assistant,
-                                       get_audio_bitrate, get_lang,
-                                       get_loop, get_video_bitrate,
+                                       assistant_scheduler,
+                                       assistantdict, get_assistant,
+                                       get_lang, get_loop,
                                        group_assistant, is_autoend,
                                        music_on, mute_off,
                                        remove_active_chat,
                                        remove_active_video_chat,
                                        set_loop)
+from YukkiMusic.utils.cache import AsyncCache
 from YukkiMusic.utils.exceptions import AssistantErr
 from YukkiMusic.utils.inline.play import (stream_markup,
                                           telegram_markup)
 from YukkiMusic.utils.stream.autoclear import auto_clean
+from YukkiMusic.utils.stream.prefetch import prefetcher
+from YukkiMusic.utils.stream.profile import stream_profiles
+from YukkiMusic.utils.stream.seek import seeker
+from YukkiMusic.utils.stream.transition import transitions
 from YukkiMusic.utils.thumbnails import gen_thumb
 
-autoend = {}
-counter = {}
-AUTO_END_TIME = 3
+JOIN_CONFIRM_TIMEOUT = 10
+
+# chat_id -> id of the assistant known to be a member of that chat.
+membership = AsyncCache(
+    "assistant_membership",
+    ttl=config.ASSISTANT_MEMBERSHIP_TTL,
+    maxsize=10000,
+)
 
 
 async def _clear_(chat_id):
+    prefetcher.cancel(chat_id)
+    transitions.cancel(chat_id)
+    seeker.forget(chat_id)
+    participants.forget(chat_id)
     db[chat_id] = []
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
@@ -59,56 +74,21 @@ async def _clear_(chat_id):
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="YukkiString1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="YukkiString2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="YukkiString3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="YukkiString4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
-        )
-        self.userbot5 = Client(
-            name="YukkiString5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-        )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
-        )
+        # Assistant number -> PyTgCalls, matching the numbering of Userbot.clients.
+        self.calls = {}
+        for num, session in enumerate(config.STRING_SESSIONS, start=1):
+            if not session:
+                continue
+            client = Client(
+                name=f"YukkiString{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+            )
+            self.calls[num] = PyTgCalls(
+                client,
+                cache_duration=100,
+            )
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -152,43 +132,22 @@ class Call(PyTgCalls):
         self, chat_id: int, link: str, video: Union[bool, str] = None
     ):
         assistant = await group_assistant(self, chat_id)
-        audio_stream_quality = await get_audio_bitrate(chat_id)
-        video_stream_quality = await get_video_bitrate(chat_id)
-        stream = (
-            AudioVideoPiped(
-                link,
-                audio_parameters=audio_stream_quality,
-                video_parameters=video_stream_quality,
-            )
-            if video
-            else AudioPiped(
-                link, audio_parameters=audio_stream_quality
-            )
-        )
+        profile = await stream_profiles.get(chat_id)
+        stream = profile.build(link, video)
         await assistant.change_stream(
             chat_id,
             stream,
         )
+        seeker.remember(chat_id, link)
+        prefetcher.schedule(chat_id)
 
     async def seek_stream(
         self, chat_id, file_path, to_seek, duration, mode
     ):
         assistant = await group_assistant(self, chat_id)
-        audio_stream_quality = await get_audio_bitrate(chat_id)
-        video_stream_quality = await get_video_bitrate(chat_id)
-        stream = (
-            AudioVideoPiped(
-                file_path,
-                audio_parameters=audio_stream_quality,
-                video_parameters=video_stream_quality,
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
-            if mode == "video"
-            else AudioPiped(
-                file_path,
-                audio_parameters=audio_stream_quality,
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
+        profile = await stream_profiles.get(chat_id)
+        stream = profile.build(
+            file_path, mode == "video", seek=(to_seek, duration)
         )
         await assistant.change_stream(chat_id, stream)
 
@@ -206,6 +165,8 @@ class Call(PyTgCalls):
         language = await get_lang(original_chat_id)
         _ = get_string(language)
         userbot = await get_assistant(chat_id)
+        if membership.get(chat_id) == userbot.id:
+            return
         try:
             try:
                 get = await app.get_chat_member(chat_id, userbot.id)
@@ -215,13 +176,20 @@ class Call(PyTgCalls):
                 raise AssistantErr(
                     _["call_2"].format(userbot.username, userbot.id)
                 )
+            membership.set(chat_id, userbot.id)
         except UserNotParticipant:
             chat = await app.get_chat(chat_id)
             if chat.username:
                 try:
                     await userbot.join_chat(chat.username)
+                    await self._confirm_join(chat_id, userbot)
                 except UserAlreadyParticipant:
-                    pass
+                    membership.set(chat_id, userbot.id)
+                except FloodWait as e:
+                    assistant_scheduler.record_flood(
+                        assistantdict.get(chat_id), e.value
+                    )
+                    raise AssistantErr(_["call_3"].format(e))
                 except Exception as e:
                     raise AssistantErr(_["call_3"].format(e))
             else:
@@ -252,15 +220,35 @@ class Call(PyTgCalls):
                         invitelink = invitelink.replace(
                             "https://t.me/+", "https://t.me/joinchat/"
                         )
-                    await asyncio.sleep(3)
                     await userbot.join_chat(invitelink)
-                    await asyncio.sleep(4)
+                    await self._confirm_join(chat_id, userbot)
                     await m.edit(_["call_6"].format(userbot.name))
                 except UserAlreadyParticipant:
-                    pass
+                    membership.set(chat_id, userbot.id)
+                except FloodWait as e:
+                    assistant_scheduler.record_flood(
+                        assistantdict.get(chat_id), e.value
+                    )
+                    raise AssistantErr(_["call_3"].format(e))
                 except Exception as e:
                     raise AssistantErr(_["call_3"].format(e))
 
+    async def _confirm_join(self, chat_id: int, userbot: Client):
+        """Wait until the bot sees the assistant as a member, instead of sleeping a fixed time."""
+        delay = 0.25
+        deadline = asyncio.get_running_loop().time() + JOIN_CONFIRM_TIMEOUT
+        while True:
+            try:
+                await app.get_chat_member(chat_id, userbot.id)
+                break
+            except UserNotParticipant:
+                if asyncio.get_running_loop().time() + delay > deadline:
+                    # Not cached, so the next play checks the membership again.
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2)
+        membership.set(chat_id, userbot.id)
+
     async def join_call(
         self,
         chat_id: int,
@@ -269,24 +257,13 @@ class Call(PyTgCalls):
         video: Union[bool, str] = None,
     ):
         assistant = await group_assistant(self, chat_id)
-        audio_stream_quality = await get_audio_bitrate(chat_id)
-        video_stream_quality = await get_video_bitrate(chat_id)
-        stream = (
-            AudioVideoPiped(
-                link,
-                audio_parameters=audio_stream_quality,
-                video_parameters=video_stream_quality,
-            )
-            if video
-            else AudioPiped(
-                link, audio_parameters=audio_stream_quality
-            )
-        )
+        profile = await stream_profiles.get(chat_id)
+        stream = profile.build(link, video)
         try:
             await assistant.join_group_call(
                 chat_id,
                 stream,
-                stream_type=StreamType().pulse_stream,
+                stream_type=profile.stream_type,
             )
         except NoActiveGroupCall:
             try:
@@ -297,32 +274,58 @@ class Call(PyTgCalls):
                 await assistant.join_group_call(
                     chat_id,
                     stream,
-                    stream_type=StreamType().pulse_stream,
+                    stream_type=profile.stream_type,
                 )
             except Exception as e:
+                membership.pop(chat_id)
                 raise AssistantErr(
                     "**No Active Voice Chat Found**\n\nPlease make sure group's voice chat is enabled. If already enabled, please end it and start fresh voice chat again and if the problem continues, try /restart"
                 )
+        except (ChatAdminRequired, UserBannedInChannel):
+            # The cached membership is stale, check the assistant again so
+            # a ban or restriction is reported instead of retried.
+            membership.pop(chat_id)
+            await self.join_assistant(original_chat_id, chat_id)
+            try:
+                await assistant.join_group_call(
+                    chat_id,
+                    stream,
+                    stream_type=profile.stream_type,
+                )
+            except (ChatAdminRequired, UserBannedInChannel):
+                membership.pop(chat_id)
+                raise AssistantErr(
+                    "**Assistant Can't Join Voice Chat**\n\nAssistant is banned or restricted in this chat. Please unban the assistant and try playing again."
+                )
         except AlreadyJoinedError:
             raise AssistantErr(
                 "**Assistant Already in Voice Chat**\n\nSystems have detected that assistant is already there in the voice chat, this issue generally comes when you play 2 queries together.\n\nIf assistant is not present in voice chat, please end voice chat and start fresh voice chat again and if the  problem continues, try /restart"
             )
+        except FloodWait as e:
+            assistant_scheduler.record_flood(
+                assistantdict.get(chat_id), e.value
+            )
+            raise AssistantErr(
+                f"**Assistant is Rate Limited**\n\nTelegram asked the assistant to wait {e.value} seconds. Please try playing again in a while."
+            )
         except TelegramServerError:
             raise AssistantErr(
                 "**Telegram Server Error**\n\nTelegram is having some internal server problems, Please try playing again.\n\n If this problem keeps coming everytime, please end your voice chat and start fresh voice chat again."
             )
+        seeker.remember(chat_id, link)
         await add_active_chat(chat_id)
         await mute_off(chat_id)
         await music_on(chat_id)
         if video:
             await add_active_video_chat(chat_id)
         if await is_autoend():
-            counter[chat_id] = {}
-            users = len(await assistant.get_participants(chat_id))
-            if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(
-                    minutes=AUTO_END_TIME
-                )
+            participants.seed(
+                chat_id,
+                [
+                    user.user_id
+                    for user in await assistant.get_participants(chat_id)
+                ],
+            )
 
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
@@ -354,10 +357,12 @@ class Call(PyTgCalls):
             user = check[0]["by"]
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
-            audio_stream_quality = await get_audio_bitrate(chat_id)
-            video_stream_quality = await get_video_bitrate(chat_id)
+            profile = await stream_profiles.get(chat_id)
             videoid = check[0]["vidid"]
+            duration = int(check[0]["seconds"])
             check[0]["played"] = 0
+            prepared = await transitions.take(chat_id, check[0])
+            prefetcher.schedule(chat_id)
             if "live_" in queued:
                 n, link = await YouTube.video(videoid, True)
                 if n == 0:
@@ -365,16 +370,8 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_9"],
                     )
-                stream = (
-                    AudioVideoPiped(
-                        link,
-                        audio_parameters=audio_stream_quality,
-                        video_parameters=video_stream_quality,
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(
-                        link, audio_parameters=audio_stream_quality
-                    )
+                stream = profile.build(
+                    link, str(streamtype) == "video"
                 )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -397,33 +394,30 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             elif "vid_" in queued:
-                mystic = await app.send_message(
-                    original_chat_id, _["call_10"]
-                )
-                try:
-                    file_path, direct = await YouTube.download(
-                        videoid,
-                        mystic,
-                        videoid=True,
-                        video=True
-                        if str(streamtype) == "video"
-                        else False,
-                    )
-                except:
-                    return await mystic.edit_text(
-                        _["call_9"], disable_web_page_preview=True
-                    )
-                stream = (
-                    AudioVideoPiped(
-                        file_path,
-                        audio_parameters=audio_stream_quality,
-                        video_parameters=video_stream_quality,
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(
-                        file_path,
-                        audio_parameters=audio_stream_quality,
+                mystic = None
+                prefetched = prefetcher.take(check[0])
+                if prefetched:
+                    file_path, direct = prefetched
+                else:
+                    mystic = await app.send_message(
+                        original_chat_id, _["call_10"]
                     )
+                    try:
+                        file_path, direct = await YouTube.download(
+                            videoid,
+                            mystic,
+                            videoid=True,
+                            video=True
+                            if str(streamtype) == "video"
+                            else False,
+                        )
+                    except:
+                        return await mystic.edit_text(
+                            _["call_9"], disable_web_page_preview=True
+                        )
+                # A prepared stream only exists for a prefetched file.
+                stream = prepared or profile.build(
+                    file_path, str(streamtype) == "video", duration=duration
                 )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -432,9 +426,11 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_9"],
                     )
+                seeker.remember(chat_id, file_path)
                 img = await gen_thumb(videoid)
                 button = stream_markup(_, videoid, chat_id)
-                await mystic.delete()
+                if mystic:
+                    await mystic.delete()
                 run = await app.send_photo(
                     original_chat_id,
                     photo=img,
@@ -447,16 +443,8 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "stream"
             elif "index_" in queued:
-                stream = (
-                    AudioVideoPiped(
-                        videoid,
-                        audio_parameters=audio_stream_quality,
-                        video_parameters=video_stream_quality,
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(
-                        videoid, audio_parameters=audio_stream_quality
-                    )
+                stream = profile.build(
+                    videoid, str(streamtype) == "video"
                 )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -475,16 +463,8 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             else:
-                stream = (
-                    AudioVideoPiped(
-                        queued,
-                        audio_parameters=audio_stream_quality,
-                        video_parameters=video_stream_quality,
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(
-                        queued, audio_parameters=audio_stream_quality
-                    )
+                stream = prepared or profile.build(
+                    queued, str(streamtype) == "video", duration=duration
                 )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -493,6 +473,7 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_9"],
                     )
+                seeker.remember(chat_id, queued)
                 if videoid == "telegram":
                     button = telegram_markup(_, chat_id)
                     run = await app.send_photo(
@@ -535,98 +516,68 @@ class Call(PyTgCalls):
                     db[chat_id][0]["markup"] = "stream"
 
     async def ping(self):
+        from YukkiMusic.core.userbot import assistants
+
         pings = []
-        if config.STRING1:
-            pings.append(await self.one.ping)
-        if config.STRING2:
-            pings.append(await self.two.ping)
-        if config.STRING3:
-            pings.append(await self.three.ping)
-        if config.STRING4:
-            pings.append(await self.four.ping)
-        if config.STRING5:
-            pings.append(await self.five.ping)
+        for num in assistants:
+            ping = await self.calls[num].ping
+            assistant_scheduler.record_ping(num, ping)
+            pings.append(ping)
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("Starting PyTgCalls Client\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        nums = list(self.calls)
+        results = await asyncio.gather(
+            *[
+                asyncio.wait_for(self.calls[num].start(), config.STARTUP_TIMEOUT)
+                for num in nums
+            ],
+            return_exceptions=True,
+        )
+        for num, result in zip(nums, results):
+            if isinstance(result, BaseException):
+                LOGGER(__name__).error(
+                    f"PyTgCalls Client {num} failed to start, skipping it: {type(result).__name__} {result}"
+                )
+                del self.calls[num]
 
     async def decorators(self):
-        @self.one.on_kicked()
-        @self.two.on_kicked()
-        @self.three.on_kicked()
-        @self.four.on_kicked()
-        @self.five.on_kicked()
-        @self.one.on_closed_voice_chat()
-        @self.two.on_closed_voice_chat()
-        @self.three.on_closed_voice_chat()
-        @self.four.on_closed_voice_chat()
-        @self.five.on_closed_voice_chat()
-        @self.one.on_left()
-        @self.two.on_left()
-        @self.three.on_left()
-        @self.four.on_left()
-        @self.five.on_left()
         async def stream_services_handler(_, chat_id: int):
             await self.stop_stream(chat_id)
 
-        @self.one.on_stream_end()
-        @self.two.on_stream_end()
-        @self.three.on_stream_end()
-        @self.four.on_stream_end()
-        @self.five.on_stream_end()
+        async def membership_lost_handler(_, chat_id: int):
+            membership.pop(chat_id)
+            await self.stop_stream(chat_id)
+
         async def stream_end_handler1(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
             await self.change_stream(client, update.chat_id)
 
-        @self.one.on_participants_change()
-        @self.two.on_participants_change()
-        @self.three.on_participants_change()
-        @self.four.on_participants_change()
-        @self.five.on_participants_change()
         async def participants_change_handler(client, update: Update):
             if not isinstance(
                 update, JoinedGroupCallParticipant
             ) and not isinstance(update, LeftGroupCallParticipant):
                 return
             chat_id = update.chat_id
-            users = counter.get(chat_id)
-            if not users:
+            if participants.needs_sync(chat_id):
                 try:
-                    got = len(await client.get_participants(chat_id))
+                    got = await client.get_participants(chat_id)
                 except:
                     return
-                counter[chat_id] = got
-                if got == 1:
-                    autoend[chat_id] = datetime.now() + timedelta(
-                        minutes=AUTO_END_TIME
-                    )
-                    return
-                autoend[chat_id] = {}
+                participants.seed(chat_id, [user.user_id for user in got])
+            elif isinstance(update, JoinedGroupCallParticipant):
+                participants.joined(chat_id, update.participant.user_id)
             else:
-                final = (
-                    users + 1
-                    if isinstance(update, JoinedGroupCallParticipant)
-                    else users - 1
-                )
-                counter[chat_id] = final
-                if final == 1:
-                    autoend[chat_id] = datetime.now() + timedelta(
-                        minutes=AUTO_END_TIME
-                    )
-                    return
-                autoend[chat_id] = {}
+                participants.left(chat_id, update.participant.user_id)
+
+        for call in self.calls.values():
+            call.on_kicked()(membership_lost_handler)
+            call.on_closed_voice_chat()(stream_services_handler)
+            call.on_left()(membership_lost_handler)
+            call.on_stream_end()(stream_end_handler1)
+            call.on_participants_change()(participants_change_handler)
 
 
 Yukki = Call()
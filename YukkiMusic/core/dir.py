@@ -11,7 +11,10 @@ import os
 import sys
 from os import listdir, mkdir
 
+import config
+
 from ..logging import LOGGER
+from .mediacache import media_cache
 
 
 def dirr():
@@ -30,4 +33,6 @@ def dirr():
         mkdir("downloads")
     if "cache" not in listdir():
         mkdir("cache")
+    os.makedirs(config.DOWNLOADS_DIR, exist_ok=True)
+    media_cache.scan()
     LOGGER(__name__).info("Directories Updated.")
@@ -0,0 +1,318 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import socket
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Optional
+
+import httpcore
+import httpx
+
+import config
+
+from ..logging import LOGGER
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+class DNSCache:
+    """Keeps resolved addresses around so new pool connections skip the lookup."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[tuple, tuple[float, list[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> list[str]:
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.time():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._entries[key] = (time.time() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int):
+        self._entries.pop((host, port), None)
+
+
+class CachingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, dns: DNSCache):
+        self._backend = httpcore.AnyIOBackend()
+        self._dns = dns
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await self._dns.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e))
+        error = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Every cached address failed, the host may have moved.
+        self._dns.forget(host, port)
+        raise error or httpcore.ConnectError(f"No address for {host}")
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None, socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout, socket_options
+        )
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+@contextmanager
+def _map_errors(request: httpx.Request):
+    """Raise httpcore failures as the httpx exception of the same name."""
+    try:
+        yield
+    except Exception as e:
+        if type(e).__module__.split(".")[0] != "httpcore":
+            raise
+        raise getattr(httpx, type(e).__name__, httpx.TransportError)(
+            str(e), request=request
+        ) from e
+
+
+class _PoolStream(httpx.AsyncByteStream):
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        with _map_errors(self._request):
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Transport over a single httpcore pool that resolves hosts through the DNS cache."""
+
+    def __init__(self, limits: httpx.Limits, retries: int, dns: DNSCache):
+        self.pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(http2=HTTP2),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=HTTP2,
+            retries=retries,
+            network_backend=CachingBackend(dns),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _map_errors(request):
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self.pool.aclose()
+
+
+def proxy_mounts(limits: httpx.Limits, retries: int) -> dict[str, Any]:
+    """Mounts for the proxy variables httpx only reads when it builds its own transport."""
+    proxies = urllib.request.getproxies()
+    no_proxy = proxies.pop("no", "")
+    if no_proxy.strip() == "*":
+        return {}
+    mounts: dict[str, Any] = {}
+    for scheme in ("http", "https", "all"):
+        url = proxies.get(scheme)
+        if not url:
+            continue
+        if "://" not in url:
+            url = f"http://{url}"
+        mounts[f"{scheme}://"] = httpx.AsyncHTTPTransport(
+            http2=HTTP2, limits=limits, retries=retries, proxy=url
+        )
+    if mounts:
+        for host in no_proxy.split(","):
+            if host := host.strip().lstrip("."):
+                # None routes the host to the pooled transport.
+                mounts[f"all://*{host}"] = None
+    return mounts
+
+
+class _HostStream(httpx.AsyncByteStream):
+    """Response body that gives the host slot back once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HTTPClient(httpx.AsyncClient):
+    """AsyncClient that caps concurrent requests per host and counts its traffic.
+
+    A slot is held from sending the request until the response body is closed,
+    so streamed downloads count against their host for as long as they run.
+    """
+
+    def __init__(self, name: str, per_host: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.name = name
+        self.per_host = per_host
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        await semaphore.acquire()
+        self.requests += 1
+        self.active += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+                semaphore.release()
+
+        try:
+            if kwargs.get("stream"):
+                response = await super().send(request, **kwargs)
+                response.stream = _HostStream(response.stream, release)
+                return response
+            try:
+                return await super().send(request, **kwargs)
+            finally:
+                release()
+        except BaseException as e:
+            if isinstance(e, httpx.HTTPError):
+                self.failures += 1
+            release()
+            raise
+
+    def stats(self) -> dict[str, Any]:
+        connections = getattr(self._transport, "pool", None)
+        connections = connections.connections if connections else []
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "active": self.active,
+            "connections": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "hosts": len(self._hosts),
+        }
+
+
+class HTTPClients:
+    """Process-wide registry of pooled HTTP clients.
+
+    Every module asks for its client by name instead of opening a session per
+    call, so connections to the same hosts are kept alive and reused.
+    """
+
+    def __init__(self):
+        self.dns = DNSCache(config.HTTP_DNS_TTL)
+        self._clients: dict[str, HTTPClient] = {}
+
+    def get(self, name: str = "default", **kwargs: Any) -> HTTPClient:
+        """Return the named client, creating it with ``kwargs`` on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_CONNECTIONS // 2,
+                keepalive_expiry=30,
+            )
+            kwargs.setdefault("timeout", httpx.Timeout(config.HTTP_TIMEOUT))
+            kwargs.setdefault("follow_redirects", True)
+            if kwargs.get("trust_env", True):
+                kwargs.setdefault(
+                    "mounts", proxy_mounts(limits, config.HTTP_RETRIES)
+                )
+            client = self._clients[name] = HTTPClient(
+                name,
+                config.HTTP_MAX_PER_HOST,
+                transport=PooledTransport(limits, config.HTTP_RETRIES, self.dns),
+                **kwargs,
+            )
+        return client
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: client.stats() for name, client in self._clients.items()}
+
+    async def close(self):
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                LOGGER(__name__).warning(
+                    f"Failed to close HTTP client {name}: {e}"
+                )
+        self._clients.clear()
+
+
+http = HTTPClients()
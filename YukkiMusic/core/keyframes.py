@@ -0,0 +1,92 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import bisect
+import os
+from typing import Optional
+
+from YukkiMusic.utils.cache import AsyncCache
+
+from ..logging import LOGGER
+
+INDEX_TTL = 7 * 24 * 60 * 60
+INDEX_SIZE = 500
+
+
+class KeyframeIndex:
+    """Keyframe timestamps of downloaded videos, read once with ffprobe.
+
+    Only packet headers are read, nothing is decoded. Seeks snap to the
+    keyframe at or before the requested time, so ffmpeg starts decoding right
+    where it lands and the reported position matches what is heard.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._index = AsyncCache("keyframes", ttl=ttl, maxsize=maxsize, persist=True)
+        self._tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.basename(str(path))
+
+    def build(self, path: str):
+        """Index a downloaded video in the background."""
+        if not path or self._key(path) in self._index:
+            return
+        task = asyncio.create_task(self.get(path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get(self, path: str) -> Optional[list[float]]:
+        return await self._index.get_or_fetch(
+            self._key(path), lambda: self._probe(path)
+        )
+
+    @staticmethod
+    async def _probe(path: str) -> Optional[list[float]]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await process.communicate()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to index keyframes of {path}: {e}")
+            return None
+        keyframes = []
+        for line in stdout.decode(errors="ignore").splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags:
+                try:
+                    keyframes.append(float(pts))
+                except ValueError:
+                    continue
+        return sorted(keyframes) or None
+
+    def snap(self, path: str, seconds: float) -> float:
+        """Return the time of the last keyframe at or before ``seconds``, if the file is indexed."""
+        keyframes = self._index.get(self._key(path))
+        if not keyframes:
+            return seconds
+        index = bisect.bisect_right(keyframes, seconds) - 1
+        return keyframes[index] if index >= 0 else seconds
+
+
+keyframes = KeyframeIndex(INDEX_TTL, INDEX_SIZE)
@@ -0,0 +1,214 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import config
+
+from ..logging import LOGGER
+
+INDEX_FILE = os.path.join(
+    "cache",
+    "media_index.json"
+    if config.SHARD_ID is None
+    else f"media_index{config.SHARD_ID}.json",
+)
+# Seconds a change of the index may wait before it is written out.
+SAVE_DELAY = 30
+
+
+@dataclass
+class MediaEntry:
+    size: int
+    last_played: float
+    plays: int = 0
+
+
+class MediaCache:
+    """Size-bounded store for everything yt-dlp and the API drop in the downloads directory.
+
+    Files are keyed by their name, which for YouTube media is the video ID,
+    so the same track is only ever stored once no matter how many chats play it.
+    """
+
+    def __init__(self, directory: str, budget: int, policy: str = "lru"):
+        self.directory = directory
+        self.budget = budget
+        self.policy = policy.lower()
+        self.entries: dict[str, MediaEntry] = {}
+        self._save_task: Optional[asyncio.Task] = None
+
+    @property
+    def used(self) -> int:
+        return sum(entry.size for entry in self.entries.values())
+
+    def _name(self, path: str) -> Optional[str]:
+        path = os.path.realpath(str(path))
+        if os.path.dirname(path) != os.path.realpath(self.directory):
+            return None
+        return os.path.basename(path)
+
+    def scan(self):
+        stored = {}
+        try:
+            with open(INDEX_FILE) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER(__name__).warning(f"Ignoring unreadable media index: {e}")
+        self.entries.clear()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".tmp-"):
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+                continue
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            old = stored.get(name, {})
+            self.entries[name] = MediaEntry(
+                size=stat.st_size,
+                last_played=old.get("last_played", stat.st_mtime),
+                plays=old.get("plays", 0),
+            )
+        self.save()
+        LOGGER(__name__).info(
+            f"Media Cache Indexed: {len(self.entries)} files, {self.used // (1024 * 1024)} MB."
+        )
+
+    def save(self):
+        tmp = f"{INDEX_FILE}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(
+                    {name: asdict(entry) for name, entry in self.entries.items()},
+                    f,
+                )
+            os.replace(tmp, INDEX_FILE)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to save media index: {e}")
+
+    def _schedule_save(self):
+        if self._save_task and not self._save_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.save()
+
+        async def delayed():
+            await asyncio.sleep(SAVE_DELAY)
+            self.save()
+
+        self._save_task = loop.create_task(delayed())
+
+    def flush(self):
+        """Write a pending change of the index now, used on shutdown."""
+        if self._save_task and not self._save_task.done():
+            self._save_task.cancel()
+            self.save()
+
+    def register(self, path: str):
+        """Start managing a file some other platform wrote into the directory."""
+        name = self._name(path)
+        if not name or name in self.entries or not os.path.isfile(path):
+            return
+        self.entries[name] = MediaEntry(
+            size=os.path.getsize(path), last_played=time.time()
+        )
+        self.enforce(keep=name)
+
+    def touch(self, path: str):
+        """Record a play of a file, registering it first if it is new."""
+        name = self._name(path)
+        if not name or not os.path.isfile(path):
+            return
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = MediaEntry(
+                size=os.path.getsize(path), last_played=time.time()
+            )
+        entry.last_played = time.time()
+        entry.plays += 1
+        self.enforce(keep=name)
+
+    def referenced(self) -> set:
+        """Names of files that some chat's queue still points at."""
+        from YukkiMusic.misc import db
+
+        names = set()
+        for queue in db.values():
+            for item in queue or []:
+                file = str(item.get("file", ""))
+                if file.startswith(("vid_", "live_", "index_")):
+                    names.add(f"{item.get('vidid')}.")
+                elif name := self._name(file):
+                    names.add(name)
+                    # Keeps the decoded copies of the file as well.
+                    names.add(name.split(".", 1)[0] + ".")
+        return names
+
+    def _protected(self, name: str, referenced: set) -> bool:
+        if name in referenced:
+            return True
+        stem = name.split(".", 1)[0] + "."
+        return stem in referenced
+
+    def _order(self, name: str):
+        entry = self.entries[name]
+        if self.policy == "lfu":
+            return entry.plays, entry.last_played
+        return (entry.last_played,)
+
+    def enforce(self, keep: Optional[str] = None) -> int:
+        """Evict unreferenced files until the store fits in its budget."""
+        used = self.used
+        if used <= self.budget:
+            self._schedule_save()
+            return 0
+        referenced = self.referenced()
+        if keep:
+            referenced.add(keep)
+        freed = 0
+        for name in sorted(self.entries, key=self._order):
+            if used - freed <= self.budget:
+                break
+            if self._protected(name, referenced):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to evict {name}: {e}")
+                continue
+            freed += self.entries.pop(name).size
+        self._schedule_save()
+        if freed:
+            LOGGER(__name__).info(
+                f"Media Cache evicted {freed // (1024 * 1024)} MB."
+            )
+        return freed
+
+
+media_cache = MediaCache(
+    config.DOWNLOADS_DIR,
+    config.MEDIA_CACHE_SIZE,
+    config.MEDIA_CACHE_POLICY,
+)
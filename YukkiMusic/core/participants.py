@@ -0,0 +1,94 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import heapq
+import time
+from typing import AsyncIterator, Iterable, Optional
+
+AUTO_END_TIME = 3
+RECONCILE_INTERVAL = 300
+
+
+class ParticipantTracker:
+    """Exact set of voice chat participants per chat, kept from join/leave updates.
+
+    A chat where the assistant is left alone gets an idle deadline; deadlines
+    live in a heap so ``expired`` sleeps exactly until the next one is due.
+    """
+
+    def __init__(self, idle_after: float, reconcile_every: float):
+        self.idle_after = idle_after
+        self.reconcile_every = reconcile_every
+        self.participants: dict[int, set[int]] = {}
+        self._synced: dict[int, float] = {}
+        self._deadlines: dict[int, float] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def needs_sync(self, chat_id: int) -> bool:
+        synced = self._synced.get(chat_id)
+        return synced is None or time.monotonic() - synced > self.reconcile_every
+
+    def seed(self, chat_id: int, user_ids: Iterable[int]):
+        """Replace what is known about a chat with a full participant list."""
+        self.participants[chat_id] = set(user_ids)
+        self._synced[chat_id] = time.monotonic()
+        self._check_idle(chat_id)
+
+    def joined(self, chat_id: int, user_id: int):
+        self.participants.setdefault(chat_id, set()).add(user_id)
+        self._check_idle(chat_id)
+
+    def left(self, chat_id: int, user_id: int):
+        self.participants.setdefault(chat_id, set()).discard(user_id)
+        self._check_idle(chat_id)
+
+    def forget(self, chat_id: int):
+        self.participants.pop(chat_id, None)
+        self._synced.pop(chat_id, None)
+        self._deadlines.pop(chat_id, None)
+
+    def _check_idle(self, chat_id: int):
+        if len(self.participants[chat_id]) > 1:
+            # Stale heap entries are skipped when they come up.
+            self._deadlines.pop(chat_id, None)
+            return
+        if chat_id in self._deadlines:
+            return
+        deadline = time.monotonic() + self.idle_after
+        self._deadlines[chat_id] = deadline
+        heapq.heappush(self._heap, (deadline, chat_id))
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def expired(self) -> AsyncIterator[int]:
+        """Yield chats as their idle deadline passes."""
+        self._wakeup = asyncio.Event()
+        while True:
+            while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            timeout = (
+                max(0, self._heap[0][0] - time.monotonic()) if self._heap else None
+            )
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, chat_id = heapq.heappop(self._heap)
+                if self._deadlines.get(chat_id) == deadline:
+                    del self._deadlines[chat_id]
+                    yield chat_id
+
+
+participants = ParticipantTracker(AUTO_END_TIME * 60, RECONCILE_INTERVAL)
@@ -0,0 +1,216 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+# Sharded mode (SHARDS > 1): the process started with `python3 -m YukkiMusic`
+# becomes a front-end that only receives the bot's updates and forwards each
+# one over a unix socket to the worker process owning its chat. Every worker
+# runs the plugins with its own share of the assistants, queues and downloads.
+# Bot-wide state (sudoers, bans, global settings) changed on one worker is
+# broadcast to the others over the same sockets.
+
+import asyncio
+import json
+import os
+import struct
+import sys
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+from pyrogram import Client, raw, utils
+from pyrogram.raw.core import TLObject
+
+import config
+
+from ..logging import LOGGER
+
+HEADER = struct.Struct("!BI")
+RESTART_DELAY = 5
+
+# Frame kinds: raw updates from the front-end and state changes between workers.
+UPDATES = 0
+EVENT = 1
+
+_handlers: dict[str, Callable[..., Any]] = {}
+
+
+def socket_path(shard: int) -> str:
+    return os.path.join("cache", f"shard{shard}.sock")
+
+
+def shard_of(chat_id: int) -> int:
+    return abs(int(chat_id)) % config.SHARDS
+
+
+def is_local(chat_id: int) -> bool:
+    """Whether a chat belongs to this process."""
+    return config.SHARD_ID is None or shard_of(chat_id) == config.SHARD_ID
+
+
+def _chat_id(update) -> Optional[int]:
+    peer = getattr(getattr(update, "message", None), "peer_id", None)
+    if peer is None:
+        peer = getattr(update, "peer", None)
+    if isinstance(peer, raw.base.Peer):
+        return utils.get_peer_id(peer)
+    if channel_id := getattr(update, "channel_id", None):
+        return utils.get_channel_id(channel_id)
+    if chat_id := getattr(update, "chat_id", None):
+        return -chat_id
+    return getattr(update, "user_id", None)
+
+
+def _shard(update) -> int:
+    chat_id = _chat_id(update)
+    return 0 if chat_id is None else shard_of(chat_id)
+
+
+def split(updates) -> dict[int, TLObject]:
+    """Break a raw updates container into one container per owning shard."""
+    if isinstance(updates, (raw.types.Updates, raw.types.UpdatesCombined)):
+        grouped = {}
+        for update in updates.updates:
+            grouped.setdefault(_shard(update), []).append(update)
+        return {
+            shard: raw.types.Updates(
+                updates=items,
+                users=updates.users,
+                chats=updates.chats,
+                date=updates.date,
+                seq=0,
+            )
+            for shard, items in grouped.items()
+        }
+    if isinstance(updates, raw.types.UpdateShort):
+        return {_shard(updates.update): updates}
+    if isinstance(updates, raw.types.UpdatesTooLong):
+        return {}
+    return {_shard(updates): updates}
+
+
+class ShardRouter:
+    def __init__(self):
+        self._writers: dict[int, asyncio.StreamWriter] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def _send(self, shard: int, data: bytes, kind: int = UPDATES):
+        lock = self._locks.setdefault(shard, asyncio.Lock())
+        async with lock:
+            writer = self._writers.get(shard)
+            if writer is None or writer.is_closing():
+                _, writer = await asyncio.open_unix_connection(
+                    socket_path(shard)
+                )
+                self._writers[shard] = writer
+            writer.write(HEADER.pack(kind, len(data)) + data)
+            await writer.drain()
+
+    async def route(self, updates):
+        for shard, part in split(updates).items():
+            try:
+                await self._send(shard, part.write())
+            except OSError as e:
+                self._writers.pop(shard, None)
+                LOGGER(__name__).warning(
+                    f"Dropped an update for shard {shard}: {e}"
+                )
+
+
+def on_event(name: str):
+    """Register a handler that applies a state change broadcast by another worker."""
+
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+async def broadcast(event: str, *args: Any):
+    """Apply a state change on every other worker of a sharded bot.
+
+    A worker that is down misses the event, it loads the state from the
+    database when it starts again.
+    """
+    if config.SHARD_ID is None:
+        return
+    data = json.dumps([event, args]).encode()
+    for shard in range(config.SHARDS):
+        if shard == config.SHARD_ID:
+            continue
+        try:
+            await router._send(shard, data, EVENT)
+        except OSError as e:
+            router._writers.pop(shard, None)
+            LOGGER(__name__).warning(
+                f"Could not send {event} to shard {shard}: {e}"
+            )
+
+
+def _dispatch(data: bytes):
+    event, args = json.loads(data)
+    handler = _handlers.get(event)
+    if handler is None:
+        return LOGGER(__name__).warning(f"No handler for shard event {event}")
+    try:
+        handler(*args)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Failed to apply shard event {event}: {e}")
+
+
+async def serve(client: Client, shard: int) -> asyncio.AbstractServer:
+    """Accept updates forwarded by the front-end and dispatch them to the plugins."""
+    path = socket_path(shard)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                kind, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+                data = await reader.readexactly(size)
+                if kind == EVENT:
+                    _dispatch(data)
+                    continue
+                updates = TLObject.read(BytesIO(data))
+                # Skip YukkiBot.handle_updates, which drops everything not forwarded.
+                asyncio.create_task(Client.handle_updates(client, updates))
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(handle, path)
+    LOGGER(__name__).info(f"Shard {shard} listening on {path}")
+    return server
+
+
+async def run_worker(shard: int):
+    while True:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "YukkiMusic",
+            env={**os.environ, "SHARD_ID": str(shard)},
+        )
+        try:
+            code = await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            raise
+        LOGGER(__name__).warning(
+            f"Shard {shard} exited with code {code}, restarting in {RESTART_DELAY}s"
+        )
+        await asyncio.sleep(RESTART_DELAY)
+
+
+router = ShardRouter()
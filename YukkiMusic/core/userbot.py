@@ -7,6 +7,7 @@
 #
 # All rights reserved.
 
+import asyncio
 import sys
 
 from pyrogram import Client
@@ -21,196 +22,68 @@ assistantids = []
 
 class Userbot(Client):
     def __init__(self):
-        self.one = Client(
-            name="YukkiString1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-            no_updates=True,
-        )
-        self.two = Client(
-            name="YukkiString2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-            no_updates=True,
-        )
-        self.three = Client(
-            name="YukkiString3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-            no_updates=True,
-        )
-        self.four = Client(
-            name="YukkiString4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-            no_updates=True,
-        )
-        self.five = Client(
-            name="YukkiString5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-            no_updates=True,
-        )
+        # Assistant number -> Client, numbered from 1 like STRING_SESSION, STRING_SESSION2, ...
+        self.clients = {}
+        for num, session in enumerate(config.STRING_SESSIONS, start=1):
+            if not session:
+                continue
+            self.clients[num] = Client(
+                name=f"YukkiString{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+                no_updates=True,
+            )
 
     async def start(self):
         LOGGER(__name__).info(f"Starting Assistant Clients")
-        if config.STRING1:
-            await self.one.start()
-            try:
-                await self.one.join_chat("TeamYM")
-                await self.one.join_chat("TheYukki")
-                await self.one.join_chat("YukkiSupport")
-            except:
-                pass
-            assistants.append(1)
-            try:
-                await self.one.send_message(
-                    config.LOG_GROUP_ID, "Assistant Started"
-                )
-            except:
-                LOGGER(__name__).error(
-                    f"Assistant Account 1 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                sys.exit()
-            get_me = await self.one.get_me()
-            self.one.username = get_me.username
-            self.one.id = get_me.id
-            assistantids.append(get_me.id)
-            if get_me.last_name:
-                self.one.name = (
-                    get_me.first_name + " " + get_me.last_name
-                )
-            else:
-                self.one.name = get_me.first_name
-            LOGGER(__name__).info(
-                f"Assistant Started as {self.one.name}"
-            )
-        if config.STRING2:
-            await self.two.start()
-            try:
-                await self.two.join_chat("TeamYM")
-                await self.two.join_chat("TheYukki")
-                await self.two.join_chat("YukkiSupport")
-            except:
-                pass
-            assistants.append(2)
-            try:
-                await self.two.send_message(
-                    config.LOG_GROUP_ID, "Assistant Started"
-                )
-            except:
-                LOGGER(__name__).error(
-                    f"Assistant Account 2 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                sys.exit()
-            get_me = await self.two.get_me()
-            self.two.username = get_me.username
-            self.two.id = get_me.id
-            assistantids.append(get_me.id)
-            if get_me.last_name:
-                self.two.name = (
-                    get_me.first_name + " " + get_me.last_name
-                )
-            else:
-                self.two.name = get_me.first_name
-            LOGGER(__name__).info(
-                f"Assistant Two Started as {self.two.name}"
+        started = await asyncio.gather(
+            *[
+                self._start_client(num, client)
+                for num, client in self.clients.items()
+            ]
+        )
+        if False in started:
+            sys.exit()
+        assistants.sort()
+
+    async def _start_client(self, num: int, client: Client):
+        try:
+            await asyncio.wait_for(client.start(), config.STARTUP_TIMEOUT)
+        except Exception as e:
+            LOGGER(__name__).error(
+                f"Assistant Account {num} failed to start, skipping it: {type(e).__name__} {e}"
             )
-        if config.STRING3:
-            await self.three.start()
-            try:
-                await self.three.join_chat("TeamYM")
-                await self.three.join_chat("TheYukki")
-                await self.three.join_chat("YukkiSupport")
-            except:
-                pass
-            assistants.append(3)
-            try:
-                await self.three.send_message(
-                    config.LOG_GROUP_ID, "Assistant Started"
-                )
-            except:
-                LOGGER(__name__).error(
-                    f"Assistant Account 3 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                sys.exit()
-            get_me = await self.three.get_me()
-            self.three.username = get_me.username
-            self.three.id = get_me.id
-            assistantids.append(get_me.id)
-            if get_me.last_name:
-                self.three.name = (
-                    get_me.first_name + " " + get_me.last_name
-                )
-            else:
-                self.three.name = get_me.first_name
-            LOGGER(__name__).info(
-                f"Assistant Three Started as {self.three.name}"
+            return None
+        get_me, _ = await asyncio.gather(
+            client.get_me(),
+            asyncio.gather(
+                client.join_chat("TeamYM"),
+                client.join_chat("TheYukki"),
+                client.join_chat("YukkiSupport"),
+                return_exceptions=True,
+            ),
+        )
+        try:
+            await client.send_message(
+                config.LOG_GROUP_ID, "Assistant Started"
             )
-        if config.STRING4:
-            await self.four.start()
-            try:
-                await self.four.join_chat("TeamYM")
-                await self.four.join_chat("TheYukki")
-                await self.four.join_chat("YukkiSupport")
-            except:
-                pass
-            assistants.append(4)
-            try:
-                await self.four.send_message(
-                    config.LOG_GROUP_ID, "Assistant Started"
-                )
-            except:
-                LOGGER(__name__).error(
-                    f"Assistant Account 4 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                sys.exit()
-            get_me = await self.four.get_me()
-            self.four.username = get_me.username
-            self.four.id = get_me.id
-            assistantids.append(get_me.id)
-            if get_me.last_name:
-                self.four.name = (
-                    get_me.first_name + " " + get_me.last_name
-                )
-            else:
-                self.four.name = get_me.first_name
-            LOGGER(__name__).info(
-                f"Assistant Four Started as {self.four.name}"
+        except:
+            LOGGER(__name__).error(
+                f"Assistant Account {num} has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
             )
-        if config.STRING5:
-            await self.five.start()
-            try:
-                await self.five.join_chat("TeamYM")
-                await self.five.join_chat("TheYukki")
-                await self.five.join_chat("YukkiSupport")
-            except:
-                pass
-            assistants.append(5)
-            try:
-                await self.five.send_message(
-                    config.LOG_GROUP_ID, "Assistant Started"
-                )
-            except:
-                LOGGER(__name__).error(
-                    f"Assistant Account 5 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                sys.exit()
-            get_me = await self.five.get_me()
-            self.five.username = get_me.username
-            self.five.id = get_me.id
-            assistantids.append(get_me.id)
-            if get_me.last_name:
-                self.five.name = (
-                    get_me.first_name + " " + get_me.last_name
-                )
-            else:
-                self.five.name = get_me.first_name
-            LOGGER(__name__).info(
-                f"Assistant Five Started as {self.five.name}"
+            return False
+        assistants.append(num)
+        client.username = get_me.username
+        client.id = get_me.id
+        assistantids.append(get_me.id)
+        if get_me.last_name:
+            client.name = (
+                get_me.first_name + " " + get_me.last_name
             )
+        else:
+            client.name = get_me.first_name
+        LOGGER(__name__).info(
+            f"Assistant {num} Started as {client.name}"
+        )
+        return True
@@ -0,0 +1,101 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Optional
+
+import config
+import ytworker
+
+from ..logging import LOGGER
+
+
+class ExtractorPool:
+    """Warm pool of worker processes that keep configured YoutubeDL instances around.
+
+    Jobs are the functions of the top level ytworker module. A job that runs
+    past its timeout takes the whole pool down with it and the pool is
+    rebuilt on next use; jobs that were caught in a crash are retried once.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.size = size
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=ytworker.warm,
+            )
+        return self._executor
+
+    def _restart(self, pool: ProcessPoolExecutor):
+        if pool is not self._executor:
+            return
+        self._executor = None
+        for process in list((pool._processes or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        pids = await asyncio.gather(
+            *[
+                loop.run_in_executor(pool, ytworker.ping)
+                for _ in range(self.size)
+            ],
+            return_exceptions=True,
+        )
+        LOGGER(__name__).info(
+            f"yt-dlp Worker Pool Ready with {len(set(p for p in pids if isinstance(p, int)))} processes"
+        )
+
+    async def run(
+        self, job: str, *args: Any, timeout: Optional[float] = None
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        func = partial(getattr(ytworker, job), *args)
+        for attempt in range(2):
+            pool = self._pool()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(pool, func),
+                    timeout or self.timeout,
+                )
+            except asyncio.TimeoutError:
+                LOGGER(__name__).warning(
+                    f"yt-dlp job {job} timed out, restarting worker pool"
+                )
+                self._restart(pool)
+                raise
+            except BrokenProcessPool:
+                LOGGER(__name__).warning(
+                    f"yt-dlp worker crashed during {job}, restarting worker pool"
+                )
+                self._restart(pool)
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._executor is not None:
+            self._restart(self._executor)
+
+
+extractor = ExtractorPool(config.YTDL_WORKERS, config.YTDL_JOB_TIMEOUT)
@@ -15,6 +15,7 @@ from pyrogram import filters
 
 import config
 from YukkiMusic.core.mongo import pymongodb
+from YukkiMusic.core.shard import on_event
 
 from .logging import LOGGER
 
@@ -76,6 +77,22 @@ def sudo():
     LOGGER(__name__).info(f"Sudoers Loaded.")
 
 
+@on_event("sudoer")
+def _sync_sudoer(user_id: int, added: bool):
+    if added:
+        SUDOERS.add(user_id)
+    else:
+        SUDOERS.discard(user_id)
+
+
+@on_event("banned")
+def _sync_banned(user_id: int, added: bool):
+    if added:
+        config.BANNED_USERS.add(user_id)
+    else:
+        config.BANNED_USERS.discard(user_id)
+
+
 def heroku():
     global HAPP
     if is_heroku:
@@ -10,10 +10,11 @@
 import re
 from typing import Union
 
-import aiohttp
 from bs4 import BeautifulSoup
 from youtubesearchpython.__future__ import VideosSearch
 
+from YukkiMusic.core.http import http
+
 
 class AppleAPI:
     def __init__(self):
@@ -29,11 +30,10 @@ class AppleAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
+        response = await http.get().get(url)
+        if response.status_code != 200:
+            return False
+        html = response.text
         soup = BeautifulSoup(html, "html.parser")
         search = None
         for tag in soup.find_all("meta"):
@@ -61,11 +61,10 @@ class AppleAPI:
         if playid:
             url = self.base + url
         playlist_id = url.split("playlist/")[1]
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
+        response = await http.get().get(url)
+        if response.status_code != 200:
+            return False
+        html = response.text
         soup = BeautifulSoup(html, "html.parser")
         applelinks = soup.find_all(
             "meta", attrs={"property": "music:song"}
@@ -10,10 +10,11 @@
 import re
 from typing import Union
 
-import aiohttp
 from bs4 import BeautifulSoup
 from youtubesearchpython.__future__ import VideosSearch
 
+from YukkiMusic.core.http import http
+
 
 class RessoAPI:
     def __init__(self):
@@ -29,11 +30,10 @@ class RessoAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
+        response = await http.get().get(url)
+        if response.status_code != 200:
+            return False
+        html = response.text
         soup = BeautifulSoup(html, "html.parser")
         for tag in soup.find_all("meta"):
             if tag.get("property", None) == "og:title":
@@ -12,13 +12,14 @@ from os import path
 
 from yt_dlp import YoutubeDL
 
+import config
 from YukkiMusic.utils.formatters import seconds_to_min
 
 
 class SoundAPI:
     def __init__(self):
         self.opts = {
-            "outtmpl": "downloads/%(id)s.%(ext)s",
+            "outtmpl": path.join(config.DOWNLOADS_DIR, "%(id)s.%(ext)s"),
             "format": "best",
             "retries": 3,
             "nooverwrites": False,
@@ -37,7 +38,7 @@ class SoundAPI:
             info = d.extract_info(url)
         except:
             return False
-        xyz = path.join("downloads", f"{info['id']}.{info['ext']}")
+        xyz = path.join(config.DOWNLOADS_DIR, f"{info['id']}.{info['ext']}")
         duration_min = seconds_to_min(info["duration"])
         track_details = {
             "title": info["title"],
@@ -95,7 +95,7 @@ class TeleAPI:
             except:
                 file_name = audio.file_unique_id + "." + ".ogg"
             file_name = os.path.join(
-                os.path.realpath("downloads"), file_name
+                os.path.realpath(config.DOWNLOADS_DIR), file_name
             )
         if video:
             try:
@@ -107,7 +107,7 @@ class TeleAPI:
             except:
                 file_name = video.file_unique_id + "." + "mp4"
             file_name = os.path.join(
-                os.path.realpath("downloads"), file_name
+                os.path.realpath(config.DOWNLOADS_DIR), file_name
             )
         return file_name
 
@@ -4,12 +4,13 @@ import random
 import re
 import time
 import uuid
+from collections import deque
 import aiofiles
 import httpx
-import yt_dlp
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Union
 from urllib.parse import unquote
 
 from pyrogram import errors
@@ -17,10 +18,18 @@ from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 from youtubesearchpython.__future__ import VideosSearch
 
+from YukkiMusic.core.http import http
+from YukkiMusic.core.keyframes import keyframes
+from YukkiMusic.core.mediacache import media_cache
+from YukkiMusic.core.ytdl import extractor
 from YukkiMusic.logging import LOGGER
+from YukkiMusic.utils.cache import AsyncCache, SingleFlight
 from YukkiMusic.utils.database import is_on_off
-from YukkiMusic.utils.formatters import time_to_seconds
-from config import API_URL, API_KEY, DOWNLOADS_DIR
+from YukkiMusic.utils.formatters import (convert_bytes, get_readable_time,
+                                         time_to_seconds)
+from config import (API_URL, API_KEY, DOWNLOADS_DIR, METADATA_CACHE_PERSIST,
+                    METADATA_CACHE_SIZE, METADATA_CACHE_TTL, SEARCH_CONCURRENCY,
+                    SEARCH_MEMO_SIZE, SEARCH_MEMO_TTL, YTDL_DOWNLOAD_TIMEOUT)
 
 @dataclass
 class DownloadResult:
@@ -31,19 +40,28 @@ class DownloadResult:
 class YouTubeAPI:
     DEFAULT_TIMEOUT = 120
     DEFAULT_DOWNLOAD_TIMEOUT = 120
-    CHUNK_SIZE = 8192
+    CHUNK_SIZE = 64 * 1024
+    MAX_WRITE_SIZE = 4 * 1024 * 1024
+    MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+    MAX_SEGMENTS = 4
+    PROGRESS_INTERVAL = 5
     MAX_RETRIES = 3  # Increased retries for robustness
     BACKOFF_FACTOR = 1.0
     BASE_URL = "https://www.youtube.com/watch?v="
     PLAYLIST_BASE = "https://youtube.com/playlist?list="
     REGEX = r"(?:youtube\.com|youtu\.be)"
     STATUS_URL = "https://www.youtube.com/oembed?url="
+    STREAM_URL_MARGIN = 300
+    STREAM_URL_REFRESH_AHEAD = 600
+    STREAM_URL_FALLBACK_TTL = 600
+    VIDEO_ID_REGEX = r"(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})"
 
     def __init__(self, timeout: int = DEFAULT_TIMEOUT, download_timeout: int = DEFAULT_DOWNLOAD_TIMEOUT, max_redirects: int = 0):
         self._timeout = timeout
         self._download_timeout = download_timeout
         self._max_redirects = max_redirects
-        self._session = httpx.AsyncClient(
+        self._session = http.get(
+            "youtube",
             timeout=httpx.Timeout(
                 connect=self._timeout,
                 read=self._timeout,
@@ -54,6 +72,22 @@ class YouTubeAPI:
             max_redirects=max_redirects,
         )
         self._regex = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+        self._id_regex = re.compile(self.VIDEO_ID_REGEX)
+        self._downloads = SingleFlight()
+        self._expire_regex = re.compile(r"(?:[?&]expire=|/expire/)(\d+)")
+        self._streams = AsyncCache("youtube_streams", ttl=self.STREAM_URL_FALLBACK_TTL, maxsize=1000)
+        self._meta = AsyncCache(
+            "youtube_metadata",
+            ttl=METADATA_CACHE_TTL,
+            maxsize=METADATA_CACHE_SIZE,
+            persist=METADATA_CACHE_PERSIST == str(True),
+        )
+        self._queries = AsyncCache(
+            "youtube_query_ids",
+            ttl=SEARCH_MEMO_TTL,
+            maxsize=SEARCH_MEMO_SIZE,
+            persist=True,
+        )
 
     async def close(self) -> None:
         try:
@@ -85,7 +119,11 @@ class YouTubeAPI:
             headers["X-API-Key"] = API_KEY
         return headers
 
-    async def download_file(self, url: str, file_path: Optional[Union[str, Path]] = None, overwrite: bool = False, **kwargs: Any) -> DownloadResult:
+    async def download_file(self, url: str, file_path: Optional[Union[str, Path]] = None, overwrite: bool = False, progress: Optional[Callable[[int, int, float], Awaitable[None]]] = None, **kwargs: Any) -> DownloadResult:
+        """Download ``url`` to ``file_path``, resuming partial files and fetching ranges in parallel when the server allows it.
+
+        ``progress`` is awaited with ``(downloaded, total, bytes_per_second)`` as data is written.
+        """
         if not url:
             return DownloadResult(success=False, error="Empty URL provided")
         headers = self._get_headers(url, kwargs.pop("headers", {}))
@@ -102,16 +140,125 @@ class YouTubeAPI:
                 if path.exists() and not overwrite:
                     return DownloadResult(success=True, file_path=path)
                 path.parent.mkdir(parents=True, exist_ok=True)
-                async with aiofiles.open(path, "wb") as f:
-                    async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
-                        await f.write(chunk)
-                LOGGER(__name__).debug("Successfully downloaded file to %s", path)
-                return DownloadResult(success=True, file_path=path)
+                total = int(response.headers.get("Content-Length") or 0)
+                ranged = total > 0 and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                state = {"done": 0, "total": total, "start": time.monotonic()}
+                part = path.with_name(f"{path.name}.part")
+                resume = not ranged and part.exists() and part.stat().st_size > 0
+                if not ranged and not resume:
+                    async with aiofiles.open(part, "wb") as f:
+                        await self._write_stream(response, f, state, progress)
+                    os.replace(part, path)
+            if ranged:
+                await self._download_ranges(url, headers, path, total, state, progress)
+            elif resume:
+                await self._resume_part(url, headers, path, part, state, progress)
+            LOGGER(__name__).debug("Successfully downloaded file to %s", path)
+            return DownloadResult(success=True, file_path=path)
         except Exception as e:
             error_msg = self._handle_http_error(e, url)
             LOGGER(__name__).error(error_msg)
             return DownloadResult(success=False, error=error_msg)
 
+    async def _resume_part(self, url: str, headers: dict[str, str], path: Path, part: Path, state: dict[str, Any], progress) -> None:
+        """Continue an interrupted single-stream download from the end of its ``.part`` file."""
+        have = part.stat().st_size
+        if state["total"] and have >= state["total"]:
+            if have == state["total"]:
+                os.replace(part, path)
+                return
+            have = 0
+        if have:
+            headers = {**headers, "Range": f"bytes={have}-"}
+        async with self._session.stream("GET", url, timeout=self._download_timeout, headers=headers) as response:
+            response.raise_for_status()
+            if have and response.status_code == 206:
+                LOGGER(__name__).debug("Resuming %s at %d bytes", path.name, have)
+                state["done"] += have
+                mode = "ab"
+            else:
+                # The server sent the whole file again.
+                mode = "wb"
+            async with aiofiles.open(part, mode) as f:
+                await self._write_stream(response, f, state, progress)
+        if state["total"] and part.stat().st_size != state["total"]:
+            raise IOError(f"Size mismatch for {path.name}: expected {state['total']} bytes")
+        os.replace(part, path)
+
+    async def _download_ranges(self, url: str, headers: dict[str, str], path: Path, total: int, state: dict[str, Any], progress) -> None:
+        count = max(1, min(self.MAX_SEGMENTS, total // self.MIN_SEGMENT_SIZE))
+        size = -(-total // count)
+        segments = []
+        for index in range(count):
+            start = index * size
+            end = min(start + size, total) - 1
+            part = path.with_name(f"{path.name}.part{index}")
+            have = part.stat().st_size if part.exists() else 0
+            if have > end - start + 1:
+                part.unlink()
+                have = 0
+            state["done"] += have
+            segments.append((part, start, end, have))
+        if any(have for *_, have in segments):
+            LOGGER(__name__).debug("Resuming %s at %d/%d bytes", path.name, state["done"], total)
+        await asyncio.gather(
+            *[
+                self._fetch_range(url, headers, part, start + have, end, state, progress)
+                for part, start, end, have in segments
+                if start + have <= end
+            ]
+        )
+        joined = path.with_name(f"{path.name}.part")
+        async with aiofiles.open(joined, "wb") as out:
+            for part, *_ in segments:
+                async with aiofiles.open(part, "rb") as f:
+                    while chunk := await f.read(self.MAX_WRITE_SIZE):
+                        await out.write(chunk)
+        if joined.stat().st_size != total:
+            raise IOError(f"Size mismatch for {path.name}: expected {total} bytes")
+        os.replace(joined, path)
+        for part, *_ in segments:
+            part.unlink(missing_ok=True)
+
+    async def _fetch_range(self, url: str, headers: dict[str, str], part: Path, start: int, end: int, state: dict[str, Any], progress) -> None:
+        headers = {**headers, "Range": f"bytes={start}-{end}"}
+        async with self._session.stream("GET", url, timeout=self._download_timeout, headers=headers) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise httpx.HTTPError(f"Server ignored range request for {url}")
+            async with aiofiles.open(part, "ab") as f:
+                await self._write_stream(response, f, state, progress)
+
+    async def _write_stream(self, response: httpx.Response, f, state: dict[str, Any], progress) -> None:
+        """Buffer network chunks and flush them in writes sized to the current throughput."""
+        write_size = self.CHUNK_SIZE
+        buffer = bytearray()
+        flushed_at = time.monotonic()
+
+        async def flush():
+            nonlocal write_size, flushed_at
+            await f.write(bytes(buffer))
+            state["done"] += len(buffer)
+            buffer.clear()
+            now = time.monotonic()
+            elapsed = now - flushed_at
+            flushed_at = now
+            # Aim for roughly four writes per second whatever the link speed.
+            if elapsed < 0.25:
+                write_size = min(write_size * 2, self.MAX_WRITE_SIZE)
+            elif elapsed > 1:
+                write_size = max(write_size // 2, self.CHUNK_SIZE)
+            if progress:
+                speed = state["done"] / max(now - state["start"], 1e-6)
+                await progress(state["done"], state["total"], speed)
+
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+            if len(buffer) >= write_size:
+                await flush()
+        if buffer:
+            await flush()
+
     async def make_request(self, url: str, max_retries: int = MAX_RETRIES, backoff_factor: float = BACKOFF_FACTOR, **kwargs: Any) -> Optional[dict[str, Any]]:
         if not url:
             LOGGER(__name__).warning("Empty URL provided")
@@ -175,7 +322,39 @@ class YouTubeAPI:
             return f"Request failed for {url}: {repr(e)}"
         return f"Unexpected error for {url}: {repr(e)}"
 
-    async def download_with_api(self, video_id: str, is_video: bool = False) -> Optional[Path]:
+    def _progress(self, mystic) -> Optional[Callable[[int, int, float], Awaitable[None]]]:
+        """Report download progress on ``mystic`` at most every few seconds."""
+        if mystic is None:
+            return None
+        edited = time.monotonic()
+
+        async def progress(done: int, total: int, speed: float):
+            nonlocal edited
+            now = time.monotonic()
+            if not total or done >= total or now - edited < self.PROGRESS_INTERVAL:
+                return
+            edited = now
+            eta = get_readable_time(int((total - done) / max(speed, 1))) or "0 sec"
+            try:
+                await mystic.edit_text(
+                    f"**Downloading:** {done * 100 / total:.1f}% of {convert_bytes(total)}\n\n"
+                    f"**Speed:** {convert_bytes(speed)}/s\n**ETA:** {eta}"
+                )
+            except Exception:
+                pass
+
+        return progress
+
+    async def download_with_api(self, video_id: str, is_video: bool = False, mystic=None) -> Optional[Path]:
+        """Download through the API once for every concurrent caller of the same video.
+
+        Progress is shown on the ``mystic`` of the caller that started the download.
+        """
+        key = ("api", video_id, bool(is_video))
+        progress = self._progress(mystic)
+        return await self._downloads.do(key, lambda: self._download_with_api(video_id, is_video, progress))
+
+    async def _download_with_api(self, video_id: str, is_video: bool = False, progress=None) -> Optional[Path]:
         if not API_URL or not API_KEY:
             LOGGER(__name__).warning("API_URL or API_KEY is not set")
             return None
@@ -192,7 +371,7 @@ class YouTubeAPI:
             LOGGER(__name__).error("API response is empty")
             return None
         if not re.match(r"https:\/\/t\.me\/(?:[a-zA-Z0-9_]{5,}|c\/\d+)\/(\d+)", dl_url):
-            dl = await self.download_file(dl_url)
+            dl = await self.download_file(dl_url, progress=progress)
             return dl.file_path if dl.success else None
         try:
             match = re.match(r"https:\/\/t\.me\/([a-zA-Z0-9_]{5,}|c\/\d+)\/(\d+)", dl_url)
@@ -210,7 +389,7 @@ class YouTubeAPI:
             return Path(path) if path else None
         except errors.FloodWait as e:
             await asyncio.sleep(e.value + 1)
-            return await self.download_with_api(video_id, is_video)
+            return await self._download_with_api(video_id, is_video, progress)
         except errors.ChatForbidden:
             LOGGER(__name__).error(f"Bot does not have access to the Telegram chat: {chat_id}")
             return None
@@ -248,110 +427,228 @@ class YouTubeAPI:
                         return entity.url
         return text[offset:offset + length] if offset is not None else None
 
-    async def details(self, link: str, videoid: Union[bool, str] = None):
+    def _cache_key(self, link: str) -> str:
+        if match := self._id_regex.search(link):
+            return match[1]
+        return " ".join(link.lower().split())
+
+    def _remember(self, result: dict) -> None:
+        if vidid := result.get("id"):
+            self._meta.set(vidid, result)
+
+    async def search(self, link: str, videoid: Union[bool, str] = None) -> dict:
+        """Return the first search result for a link or query, read through the metadata cache."""
         if videoid:
             link = self.BASE_URL + link
         if "&" in link:
             link = link.split("&")[0]
+
+        key = self._cache_key(link)
+
+        async def fetch(query: str):
+            results = VideosSearch(query, limit=1)
+            return (await results.next())["result"][0]
+
+        async def resolve():
+            result = await fetch(link)
+            self._remember(result)
+            return result.get("id")
+
+        # Queries only map to a video ID, the full record always comes from
+        # the metadata cache so every caller sees the same fields.
+        vidid = key if self._id_regex.search(link) else None
+        if vidid is None:
+            vidid = await self._queries.get_or_fetch(key, resolve)
+        return await self._meta.get_or_fetch(
+            vidid, partial(fetch, self.BASE_URL + vidid)
+        )
+
+    async def iter_details(
+        self,
+        links: Union[list[str], AsyncIterator[str]],
+        videoid: Union[bool, str] = None,
+        concurrency: int = SEARCH_CONCURRENCY,
+    ) -> AsyncIterator[tuple]:
+        """Yield ``details`` for every link in order, looking up to ``concurrency`` of them at once.
+
+        ``links`` may itself be an async iterator such as ``iter_playlist``.
+        Each result is yielded as soon as it and everything before it has
+        resolved, so the caller can start on the first track while the rest
+        are still being searched. Leaving the loop early cancels the lookups.
+        """
+        async def source():
+            if hasattr(links, "__aiter__"):
+                async for link in links:
+                    yield link
+            else:
+                for link in links:
+                    yield link
+
+        pending = source()
+        window: deque[asyncio.Future] = deque()
+        exhausted = False
         try:
-            results = VideosSearch(link, limit=1)
-            for result in (await results.next())["result"]:
-                title = result.get("title", "Unknown Title")
-                duration_min = result.get("duration", "None")
-                thumbnail = result.get("thumbnails", [{}])[0].get("url", "").split("?")[0]
-                vidid = result.get("id", "")
-                duration_sec = 0 if str(duration_min) == "None" else int(time_to_seconds(duration_min))
-                return title, duration_min, duration_sec, thumbnail, vidid
+            while True:
+                # Only look ahead a window's worth; a consumer that stops early
+                # (e.g. at PLAYLIST_FETCH_LIMIT) never pays for the rest.
+                while not exhausted and len(window) < concurrency:
+                    try:
+                        link = await pending.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    window.append(asyncio.ensure_future(self.details(link, videoid)))
+                if not window:
+                    return
+                yield await window.popleft()
+        finally:
+            for task in window:
+                task.cancel()
+            await pending.aclose()
+            if hasattr(links, "aclose"):
+                await links.aclose()
+
+    async def batch_details(
+        self, links: list[str], videoid: Union[bool, str] = None
+    ) -> list[tuple]:
+        return [details async for details in self.iter_details(links, videoid)]
+
+    async def details(self, link: str, videoid: Union[bool, str] = None):
+        try:
+            result = await self.search(link, videoid)
+            title = result.get("title", "Unknown Title")
+            duration_min = result.get("duration", "None")
+            thumbnail = result.get("thumbnails", [{}])[0].get("url", "").split("?")[0]
+            vidid = result.get("id", "")
+            duration_sec = 0 if str(duration_min) == "None" else int(time_to_seconds(duration_min))
+            return title, duration_min, duration_sec, thumbnail, vidid
         except Exception as e:
             LOGGER(__name__).error(f"Error fetching details for {link}: {repr(e)}")
             return None, None, None, None, None
 
     async def title(self, link: str, videoid: Union[bool, str] = None) -> str:
-        if videoid:
-            link = self.BASE_URL + link
-        if "&" in link:
-            link = link.split("&")[0]
         try:
-            results = VideosSearch(link, limit=1)
-            return (await results.next())["result"][0].get("title", "Unknown Title")
+            return (await self.search(link, videoid)).get("title", "Unknown Title")
         except Exception as e:
             LOGGER(__name__).error(f"Error fetching title for {link}: {repr(e)}")
             return "Unknown Title"
 
     async def duration(self, link: str, videoid: Union[bool, str] = None) -> str:
-        if videoid:
-            link = self.BASE_URL + link
-        if "&" in link:
-            link = link.split("&")[0]
         try:
-            results = VideosSearch(link, limit=1)
-            return (await results.next())["result"][0].get("duration", "None")
+            return (await self.search(link, videoid)).get("duration", "None")
         except Exception as e:
             LOGGER(__name__).error(f"Error fetching duration for {link}: {repr(e)}")
             return "None"
 
     async def thumbnail(self, link: str, videoid: Union[bool, str] = None) -> str:
-        if videoid:
-            link = self.BASE_URL + link
-        if "&" in link:
-            link = link.split("&")[0]
         try:
-            results = VideosSearch(link, limit=1)
-            return (await results.next())["result"][0].get("thumbnails", [{}])[0].get("url", "").split("?")[0]
+            return (await self.search(link, videoid)).get("thumbnails", [{}])[0].get("url", "").split("?")[0]
         except Exception as e:
             LOGGER(__name__).error(f"Error fetching thumbnail for {link}: {repr(e)}")
             return ""
 
     async def video(self, link: str, videoid: Union[bool, str] = None) -> tuple[int, str]:
-        if dl := await self.download_with_api(link, True):
-            return 1, str(dl)
+        try:
+            return 1, await self.resolve_stream(link, videoid)
+        except Exception as e:
+            LOGGER(__name__).error(f"Error fetching video stream for {link}: {repr(e)}")
+            return 0, str(e)
+
+    async def resolve_stream(self, link: str, videoid: Union[bool, str] = None) -> str:
+        """Return a playable source for a video: an API-served local file or a googlevideo URL.
+
+        Results are cached until shortly before the URL's ``expire=`` time, so
+        re-resolving the same video for a seek or a skip costs no extractor call.
+        """
+        api_id = link
         if videoid:
             link = self.BASE_URL + link
         if "&" in link:
             link = link.split("&")[0]
+        key = self._cache_key(link)
+        cached = self._streams.get(key)
+        if cached and not cached.startswith("http") and not os.path.exists(cached):
+            self._streams.pop(key)
+
+        async def resolve():
+            if dl := await self.download_with_api(api_id, True):
+                return str(dl)
+            url = await self._stream_url(link)
+            self._schedule_stream_refresh(key, link, url)
+            return url
+
+        return await self._streams.get_or_fetch(key, resolve, ttl=self._stream_ttl)
+
+    async def _stream_url(self, link: str) -> str:
+        ytdl_opts = {
+            "format": "best[height<=?720][width<=?1280]",
+            "quiet": True,
+            "no_warnings": True,
+            "cookiefile": self.get_cookie_file() or "",
+        }
+        return await extractor.run("stream_url", link, ytdl_opts)
+
+    def _stream_ttl(self, source: str) -> float:
+        if not source.startswith("http"):
+            return METADATA_CACHE_TTL
+        match = self._expire_regex.search(source)
+        if not match:
+            return self.STREAM_URL_FALLBACK_TTL
+        return max(int(match[1]) - time.time() - self.STREAM_URL_MARGIN, 0)
+
+    def _schedule_stream_refresh(self, key: str, link: str, url: str) -> None:
+        delay = self._stream_ttl(url) - self.STREAM_URL_REFRESH_AHEAD
+        if delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(delay, lambda: loop.create_task(self._refresh_stream(key, link)))
+
+    async def _refresh_stream(self, key: str, link: str) -> None:
+        from YukkiMusic.misc import db
+
+        queued = any(
+            item.get("vidid") == key and str(item.get("file", "")).startswith(("vid_", "live_"))
+            for queue in db.values()
+            for item in queue or []
+        )
+        if not queued:
+            return
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "yt-dlp",
-                "--cookies", self.get_cookie_file() or "",
-                "-g",
-                "-f",
-                "best[height<=?720][width<=?1280]",
-                link,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            return (1, stdout.decode().split("\n")[0]) if stdout else (0, stderr.decode())
+            url = await self._stream_url(link)
         except Exception as e:
-            LOGGER(__name__).error(f"Error fetching video stream for {link}: {repr(e)}")
-            return 0, str(e)
+            LOGGER(__name__).warning(f"Background refresh of stream URL for {key} failed: {repr(e)}")
+            return
+        self._streams.set(key, url, self._stream_ttl(url))
+        self._schedule_stream_refresh(key, link, url)
 
     async def playlist(self, link: str, limit: int, user_id: int, videoid: Union[bool, str] = None) -> list[str]:
         if videoid:
             link = self.PLAYLIST_BASE + link
         if "&" in link:
             link = link.split("&")[0]
+        ytdl_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "cookiefile": self.get_cookie_file() or "",
+        }
         try:
-            proc = await asyncio.create_subprocess_shell(
-                f"yt-dlp -i --get-id --flat-playlist --playlist-end {limit} --skip-download {link}",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            out, errorz = await proc.communicate()
-            result = out.decode("utf-8").split("\n") if not errorz or "unavailable videos are hidden" in errorz.decode("utf-8").lower() else []
-            return [key for key in result if key]
+            return await extractor.run("flat_playlist", link, limit, ytdl_opts)
         except Exception as e:
             LOGGER(__name__).error(f"Error fetching playlist for {link}: {repr(e)}")
             return []
 
+    async def iter_playlist(self, link: str, limit: int, user_id: int, videoid: Union[bool, str] = None) -> AsyncIterator[str]:
+        """Yield up to ``limit`` video IDs of a playlist.
+
+        The flat listing is extracted once and handed out one ID at a time,
+        so ``iter_details`` starts on the first tracks while it walks the rest.
+        """
+        for vidid in await self.playlist(link, limit, user_id, videoid):
+            yield vidid
+
     async def track(self, link: str, videoid: Union[bool, str] = None) -> tuple[dict, str]:
-        if videoid:
-            link = self.BASE_URL + link
-        if "&" in link:
-            link = link.split("&")[0]
         try:
-            results = VideosSearch(link, limit=1)
-            result = (await results.next())["result"][0]
+            result = await self.search(link, videoid)
             track_details = {
                 "title": result.get("title", "Unknown Title"),
                 "link": result.get("link", ""),
@@ -375,44 +672,43 @@ class YouTubeAPI:
             "noplaylist": True,
         }
         try:
-            with yt_dlp.YoutubeDL(ytdl_opts) as ydl:
-                formats_available = []
-                info = ydl.extract_info(link, download=False)
-                for format in info.get("formats", []):
-                    if not format.get("vcodec", "none") == "none" or format.get("acodec", "none") == "none":
-                        # Include both video and audio-only formats
-                        format_data = {
-                            "format": format.get("format", "Unknown"),
-                            "filesize": format.get("filesize") or format.get("filesize_approx"),
-                            "format_id": format.get("format_id", ""),
-                            "ext": format.get("ext", ""),
-                            "format_note": format.get("format_note", "Unknown"),
-                            "yturl": link,
-                        }
-                        if all(format_data[key] for key in ["format_id", "ext"]):  # Minimal required keys
-                            formats_available.append(format_data)
-                if not formats_available:
-                    LOGGER(__name__).warning(f"No valid formats found for {link}")
-                    # Fallback to default formats
-                    formats_available = [
-                        {
-                            "format": "bestaudio",
-                            "filesize": None,
-                            "format_id": "bestaudio",
-                            "ext": "m4a",
-                            "format_note": "Audio",
-                            "yturl": link,
-                        },
-                        {
-                            "format": "bestvideo[height<=720]+bestaudio",
-                            "filesize": None,
-                            "format_id": "bestvideo[height<=720]+bestaudio",
-                            "ext": "mp4",
-                            "format_note": "720p Video",
-                            "yturl": link,
-                        }
-                    ]
-                return formats_available, link
+            info = await extractor.run("extract_info", link, ytdl_opts)
+            formats_available = []
+            for format in info.get("formats", []):
+                if not format.get("vcodec", "none") == "none" or format.get("acodec", "none") == "none":
+                    # Include both video and audio-only formats
+                    format_data = {
+                        "format": format.get("format", "Unknown"),
+                        "filesize": format.get("filesize") or format.get("filesize_approx"),
+                        "format_id": format.get("format_id", ""),
+                        "ext": format.get("ext", ""),
+                        "format_note": format.get("format_note", "Unknown"),
+                        "yturl": link,
+                    }
+                    if all(format_data[key] for key in ["format_id", "ext"]):  # Minimal required keys
+                        formats_available.append(format_data)
+            if not formats_available:
+                LOGGER(__name__).warning(f"No valid formats found for {link}")
+                # Fallback to default formats
+                formats_available = [
+                    {
+                        "format": "bestaudio",
+                        "filesize": None,
+                        "format_id": "bestaudio",
+                        "ext": "m4a",
+                        "format_note": "Audio",
+                        "yturl": link,
+                    },
+                    {
+                        "format": "bestvideo[height<=720]+bestaudio",
+                        "filesize": None,
+                        "format_id": "bestvideo[height<=720]+bestaudio",
+                        "ext": "mp4",
+                        "format_note": "720p Video",
+                        "yturl": link,
+                    }
+                ]
+            return formats_available, link
         except Exception as e:
             LOGGER(__name__).error(f"Error extracting formats for {link}: {repr(e)}")
             # Fallback to default formats on error
@@ -440,9 +736,16 @@ class YouTubeAPI:
             link = self.BASE_URL + link
         if "&" in link:
             link = link.split("&")[0]
-        try:
+
+        async def fetch():
             results = VideosSearch(link, limit=10)
-            result = (await results.next())["result"][query_type]
+            return (await results.next())["result"]
+
+        try:
+            results = await self._meta.get_or_fetch(f"slider:{self._cache_key(link)}", fetch)
+            for item in results:
+                self._remember(item)
+            result = results[query_type]
             return (
                 result.get("title", "Unknown Title"),
                 result.get("duration", "None"),
@@ -453,142 +756,83 @@ class YouTubeAPI:
             LOGGER(__name__).error(f"Error fetching slider data for {link}: {repr(e)}")
             return "", "None", "", ""
 
-    async def download(self, link: str, mystic, video: Union[bool, str] = None, videoid: Union[bool, str] = None, songaudio: Union[bool, str] = None, songvideo: Union[bool, str] = None, format_id: Union[bool, str] = None, title: Union[bool, str] = None) -> Union[str, tuple[str, bool]]:
-        if videoid:
-            link = self.BASE_URL + link
-        loop = asyncio.get_running_loop()
+    @staticmethod
+    def _played(path: Union[str, Path]) -> str:
+        media_cache.touch(str(path))
+        return str(path)
 
-        def audio_dl():
-            ydl_optssx = {
-                "format": "bestaudio/best",
-                "outtmpl": "downloads/%(id)s.%(ext)s",
-                "geo_bypass": True,
-                "nocheckcertificate": True,
-                "quiet": True,
-                "cookiefile": self.get_cookie_file() or "",
-                "no_warnings": True,
-            }
-            try:
-                with yt_dlp.YoutubeDL(ydl_optssx) as x:
-                    info = x.extract_info(link, download=False)
-                    xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
-                    if os.path.exists(xyz):
-                        return xyz
-                    x.download([link])
-                    return xyz
-            except Exception as e:
-                LOGGER(__name__).error(f"Error downloading audio for {link}: {repr(e)}")
-                return None
+    async def _coalesced_download(self, link: str, kind: str, ydl_opts: dict[str, Any], filename: Optional[str] = None, ext: Optional[str] = None) -> Optional[str]:
+        key = (self._cache_key(link), kind, ydl_opts["format"], filename)
+        if key in self._downloads:
+            LOGGER(__name__).debug("Joining in-flight %s download for %s", kind, key[0])
 
-        def video_dl():
-            ydl_optssx = {
-                "format": "(bestvideo[height<=?720][width<=?1280][ext=mp4])+(bestaudio[ext=m4a])",
-                "outtmpl": "downloads/%(id)s.%(ext)s",
-                "geo_bypass": True,
-                "cookiefile": self.get_cookie_file() or "",
-                "nocheckcertificate": True,
-                "quiet": True,
-                "no_warnings": True,
-            }
+        async def job():
             try:
-                with yt_dlp.YoutubeDL(ydl_optssx) as x:
-                    info = x.extract_info(link, download=False)
-                    xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
-                    if os.path.exists(xyz):
-                        return xyz
-                    x.download([link])
-                    return xyz
+                return await extractor.run("download", link, ydl_opts, DOWNLOADS_DIR, filename, ext, timeout=YTDL_DOWNLOAD_TIMEOUT)
             except Exception as e:
-                LOGGER(__name__).error(f"Error downloading video for {link}: {repr(e)}")
+                LOGGER(__name__).error(f"Error downloading {kind} for {link}: {repr(e)}")
                 return None
 
-        def song_video_dl():
-            formats = f"{format_id}+bestaudio" if format_id else "bestvideo[height<=720]+bestaudio"
-            fpath = f"downloads/{title}"
-            ydl_optssx = {
-                "format": formats,
-                "outtmpl": fpath,
-                "geo_bypass": True,
-                "nocheckcertificate": True,
-                "cookiefile": self.get_cookie_file() or "",
-                "quiet": True,
-                "no_warnings": True,
-                "prefer_ffmpeg": True,
-                "merge_output_format": "mp4",
-            }
-            try:
-                with yt_dlp.YoutubeDL(ydl_optssx) as x:
-                    x.download([link])
-                return f"downloads/{title}.mp4"
-            except Exception as e:
-                LOGGER(__name__).error(f"Error downloading song video for {link}: {repr(e)}")
-                return None
+        return await self._downloads.do(key, job)
 
-        def song_audio_dl():
-            fpath = f"downloads/{title}.%(ext)s"
-            ydl_optssx = {
-                "format": format_id or "bestaudio",
-                "outtmpl": fpath,
-                "geo_bypass": True,
-                "nocheckcertificate": True,
-                "quiet": True,
-                "cookiefile": self.get_cookie_file() or "",
-                "no_warnings": True,
-                "prefer_ffmpeg": True,
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ],
-            }
-            try:
-                with yt_dlp.YoutubeDL(ydl_optssx) as x:
-                    x.download([link])
-                return f"downloads/{title}.mp3"
-            except Exception as e:
-                LOGGER(__name__).error(f"Error downloading song audio for {link}: {repr(e)}")
-                return None
+    async def download(self, link: str, mystic, video: Union[bool, str] = None, videoid: Union[bool, str] = None, songaudio: Union[bool, str] = None, songvideo: Union[bool, str] = None, format_id: Union[bool, str] = None, title: Union[bool, str] = None) -> Union[str, tuple[str, bool]]:
+        if videoid:
+            link = self.BASE_URL + link
+        base_opts = {
+            "geo_bypass": True,
+            "nocheckcertificate": True,
+            "quiet": True,
+            "cookiefile": self.get_cookie_file() or "",
+            "no_warnings": True,
+        }
+        audio_opts = {**base_opts, "format": "bestaudio/best"}
+        video_opts = {**base_opts, "format": "(bestvideo[height<=?720][width<=?1280][ext=mp4])+(bestaudio[ext=m4a])"}
+        song_video_opts = {
+            **base_opts,
+            "format": f"{format_id}+bestaudio" if format_id else "bestvideo[height<=720]+bestaudio",
+            "prefer_ffmpeg": True,
+            "merge_output_format": "mp4",
+        }
+        song_audio_opts = {
+            **base_opts,
+            "format": format_id or "bestaudio",
+            "prefer_ffmpeg": True,
+            "postprocessors": [
+                {
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": "mp3",
+                    "preferredquality": "192",
+                }
+            ],
+        }
 
         if songvideo:
-            if dl := await self.download_with_api(link, True):
+            if dl := await self.download_with_api(link, True, mystic):
                 return str(dl)
-            return await loop.run_in_executor(None, song_video_dl) or ""
+            return await self._coalesced_download(link, "song_video", song_video_opts, filename=title, ext="mp4") or ""
         elif songaudio:
-            if dl := await self.download_with_api(link):
+            if dl := await self.download_with_api(link, mystic=mystic):
                 return str(dl)
-            return await loop.run_in_executor(None, song_audio_dl) or ""
+            return await self._coalesced_download(link, "song_audio", song_audio_opts, filename=title, ext="mp3") or ""
         elif video:
             direct = True
             if await is_on_off(1):
-                downloaded_file = await loop.run_in_executor(None, video_dl)
+                downloaded_file = await self._coalesced_download(link, "video", video_opts)
+                keyframes.build(downloaded_file)
             else:
-                if dl := await self.download_with_api(link, True):
-                    return str(dl), direct
                 try:
-                    proc = await asyncio.create_subprocess_exec(
-                        "yt-dlp",
-                        "--cookies", self.get_cookie_file() or "",
-                        "-g",
-                        "-f",
-                        "best[height<=?720][width<=?1280]",
-                        link,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-                    stdout, stderr = await proc.communicate()
-                    if stdout:
-                        downloaded_file = stdout.decode().split("\n")[0]
-                        direct = None
-                    else:
-                        return "", direct
+                    downloaded_file = await self.resolve_stream(link)
                 except Exception as e:
-                    LOGGER(__name__).error(f"Error in video download subprocess for {link}: {repr(e)}")
+                    LOGGER(__name__).error(f"Error resolving video stream for {link}: {repr(e)}")
                     return "", direct
+                if not downloaded_file.startswith("http"):
+                    return self._played(downloaded_file), direct
+                direct = None
         else:
             direct = True
-            if dl := await self.download_with_api(link):
-                return str(dl), direct
-            downloaded_file = await loop.run_in_executor(None, audio_dl)
+            if dl := await self.download_with_api(link, mystic=mystic):
+                return self._played(dl), direct
+            downloaded_file = await self._coalesced_download(link, "audio", audio_opts)
+        if direct and downloaded_file:
+            self._played(downloaded_file)
         return downloaded_file or "", direct
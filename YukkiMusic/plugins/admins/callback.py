@@ -22,6 +22,8 @@ from YukkiMusic.utils.inline.play import (panel_markup_1,
                                           stream_markup,
                                           telegram_markup)
 from YukkiMusic.utils.stream.autoclear import auto_clean
+from YukkiMusic.utils.stream.prefetch import prefetcher
+from YukkiMusic.utils.stream.seek import seeker
 from YukkiMusic.utils.thumbnails import gen_thumb
 
 wrong = {}
@@ -210,6 +212,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         await CallbackQuery.answer()
         random.shuffle(check)
         check.insert(0, popped)
+        prefetcher.schedule(chat_id)
         await CallbackQuery.message.reply_text(
             _["admin_23"].format(mention)
         )
@@ -278,24 +281,33 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["markup"] = "tg"
             await CallbackQuery.edit_message_text(txt)
         elif "vid_" in queued:
-            mystic = await CallbackQuery.message.reply_text(
-                _["call_10"], disable_web_page_preview=True
-            )
-            try:
-                file_path, direct = await YouTube.download(
-                    videoid,
-                    mystic,
-                    videoid=True,
-                    video=status,
+            mystic = None
+            prefetched = prefetcher.take(check[0])
+            if prefetched:
+                file_path, direct = prefetched
+            else:
+                mystic = await CallbackQuery.message.reply_text(
+                    _["call_10"], disable_web_page_preview=True
                 )
-            except:
-                return await mystic.edit_text(_["call_9"])
+                try:
+                    file_path, direct = await YouTube.download(
+                        videoid,
+                        mystic,
+                        videoid=True,
+                        video=status,
+                    )
+                except:
+                    return await mystic.edit_text(_["call_9"])
             try:
                 await Yukki.skip_stream(
                     chat_id, file_path, video=status
                 )
             except Exception:
-                return await mystic.edit_text(_["call_9"])
+                if mystic:
+                    return await mystic.edit_text(_["call_9"])
+                return await CallbackQuery.message.reply_text(
+                    _["call_9"]
+                )
             button = stream_markup(_, videoid, chat_id)
             img = await gen_thumb(videoid)
             run = await CallbackQuery.message.reply_photo(
@@ -309,7 +321,8 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["mystic"] = run
             db[chat_id][0]["markup"] = "stream"
             await CallbackQuery.edit_message_text(txt)
-            await mystic.delete()
+            if mystic:
+                await mystic.delete()
         elif "index_" in queued:
             try:
                 await Yukki.skip_stream(
@@ -391,7 +404,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             return await CallbackQuery.answer(
                 _["admin_30"], show_alert=True
             )
-        duration_played = int(playing[0]["played"])
+        duration_played = seeker.position(chat_id)
         if int(command) in [1, 2]:
             duration_to_skip = 10
         else:
@@ -404,7 +417,7 @@ async def del_back_playlist(client, CallbackQuery, _):
                     f"Bot is not able to seek due to total duration has been exceeded.\n\nCurrently played** {bet}** mins out of **{duration}** mins",
                     show_alert=True,
                 )
-            to_seek = duration_played - duration_to_skip + 1
+            to_seek = duration_played - duration_to_skip
         else:
             if (
                 duration_seconds
@@ -415,29 +428,13 @@ async def del_back_playlist(client, CallbackQuery, _):
                     f"Bot is not able to seek due to total duration has been exceeded.\n\nCurrently played** {bet}** mins out of **{duration}** mins",
                     show_alert=True,
                 )
-            to_seek = duration_played + duration_to_skip + 1
+            to_seek = duration_played + duration_to_skip
         await CallbackQuery.answer()
         mystic = await CallbackQuery.message.reply_text(_["admin_32"])
-        if "vid_" in file_path:
-            n, file_path = await YouTube.video(
-                playing[0]["vidid"], True
-            )
-            if n == 0:
-                return await mystic.edit_text(_["admin_30"])
         try:
-            await Yukki.seek_stream(
-                chat_id,
-                file_path,
-                seconds_to_min(to_seek),
-                duration,
-                playing[0]["streamtype"],
-            )
+            to_seek = await seeker.seek(chat_id, to_seek)
         except:
             return await mystic.edit_text(_["admin_34"])
-        if int(command) in [1, 3]:
-            db[chat_id][0]["played"] -= duration_to_skip
-        else:
-            db[chat_id][0]["played"] += duration_to_skip
         string = _["admin_33"].format(seconds_to_min(to_seek))
         await mystic.edit_text(
             f"{string}\n\nChanges done by: {mention}"
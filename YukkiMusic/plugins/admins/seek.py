@@ -12,10 +12,10 @@ from pyrogram.types import Message
 
 from config import BANNED_USERS
 from strings import get_command
-from YukkiMusic import YouTube, app
-from YukkiMusic.core.call import Yukki
+from YukkiMusic import app
 from YukkiMusic.misc import db
 from YukkiMusic.utils import AdminRightsCheck, seconds_to_min
+from YukkiMusic.utils.stream.seek import seeker
 
 # Commands
 SEEK_COMMAND = get_command("SEEK_COMMAND")
@@ -42,7 +42,7 @@ async def seek_comm(cli, message: Message, _, chat_id):
     file_path = playing[0]["file"]
     if "index_" in file_path or "live_" in file_path:
         return await message.reply_text(_["admin_30"])
-    duration_played = int(playing[0]["played"])
+    duration_played = seeker.position(chat_id)
     duration_to_skip = int(query)
     duration = playing[0]["dur"]
     if message.command[0][-2] == "c":
@@ -52,7 +52,7 @@ async def seek_comm(cli, message: Message, _, chat_id):
                     seconds_to_min(duration_played), duration
                 )
             )
-        to_seek = duration_played - duration_to_skip + 1
+        to_seek = duration_played - duration_to_skip
     else:
         if (
             duration_seconds - (duration_played + duration_to_skip)
@@ -62,26 +62,12 @@ async def seek_comm(cli, message: Message, _, chat_id):
                     seconds_to_min(duration_played), duration
                 )
             )
-        to_seek = duration_played + duration_to_skip + 1
+        to_seek = duration_played + duration_to_skip
     mystic = await message.reply_text(_["admin_32"])
-    if "vid_" in file_path:
-        n, file_path = await YouTube.video(playing[0]["vidid"], True)
-        if n == 0:
-            return await message.reply_text(_["admin_30"])
     try:
-        await Yukki.seek_stream(
-            chat_id,
-            file_path,
-            seconds_to_min(to_seek),
-            duration,
-            playing[0]["streamtype"],
-        )
+        to_seek = await seeker.seek(chat_id, to_seek)
     except:
         return await mystic.edit_text(_["admin_34"])
-    if message.command[0][-2] == "c":
-        db[chat_id][0]["played"] -= duration_to_skip
-    else:
-        db[chat_id][0]["played"] += duration_to_skip
     await mystic.edit_text(
         _["admin_33"].format(seconds_to_min(to_seek))
     )
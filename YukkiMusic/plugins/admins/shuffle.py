@@ -17,6 +17,7 @@ from strings import get_command
 from YukkiMusic import app
 from YukkiMusic.misc import db
 from YukkiMusic.utils.decorators import AdminRightsCheck
+from YukkiMusic.utils.stream.prefetch import prefetcher
 
 # Commands
 SHUFFLE_COMMAND = get_command("SHUFFLE_COMMAND")
@@ -44,6 +45,7 @@ async def admins(Client, message: Message, _, chat_id):
         return await message.reply_text(_["admin_22"])
     random.shuffle(check)
     check.insert(0, popped)
+    prefetcher.schedule(chat_id)
     await message.reply_text(
         _["admin_23"].format(message.from_user.first_name)
     )
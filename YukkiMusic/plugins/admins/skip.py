@@ -21,6 +21,7 @@ from YukkiMusic.utils.decorators import AdminRightsCheck
 from YukkiMusic.utils.inline.play import (stream_markup,
                                           telegram_markup)
 from YukkiMusic.utils.stream.autoclear import auto_clean
+from YukkiMusic.utils.stream.prefetch import prefetcher
 from YukkiMusic.utils.thumbnails import gen_thumb
 
 # Commands
@@ -135,22 +136,29 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "tg"
     elif "vid_" in queued:
-        mystic = await message.reply_text(
-            _["call_10"], disable_web_page_preview=True
-        )
-        try:
-            file_path, direct = await YouTube.download(
-                videoid,
-                mystic,
-                videoid=True,
-                video=status,
+        mystic = None
+        prefetched = prefetcher.take(check[0])
+        if prefetched:
+            file_path, direct = prefetched
+        else:
+            mystic = await message.reply_text(
+                _["call_10"], disable_web_page_preview=True
             )
-        except:
-            return await mystic.edit_text(_["call_9"])
+            try:
+                file_path, direct = await YouTube.download(
+                    videoid,
+                    mystic,
+                    videoid=True,
+                    video=status,
+                )
+            except:
+                return await mystic.edit_text(_["call_9"])
         try:
             await Yukki.skip_stream(chat_id, file_path, video=status)
         except Exception:
-            return await mystic.edit_text(_["call_9"])
+            if mystic:
+                return await mystic.edit_text(_["call_9"])
+            return await message.reply_text(_["call_9"])
         button = stream_markup(_, videoid, chat_id)
         img = await gen_thumb(videoid)
         run = await message.reply_photo(
@@ -163,7 +171,8 @@ async def skip(cli, message: Message, _, chat_id):
         )
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "stream"
-        await mystic.delete()
+        if mystic:
+            await mystic.delete()
     elif "index_" in queued:
         try:
             await Yukki.skip_stream(chat_id, videoid, video=status)
@@ -13,7 +13,6 @@ from pyrogram import filters
 from pyrogram.enums import ChatType, ParseMode
 from pyrogram.types import (InlineKeyboardButton,
                             InlineKeyboardMarkup, Message)
-from youtubesearchpython.__future__ import VideosSearch
 
 import config
 from config import BANNED_USERS
@@ -27,7 +26,8 @@ from YukkiMusic.utils.database import (add_served_chat,
                                        add_served_user,
                                        blacklisted_chats,
                                        get_assistant, get_lang,
-                                       get_userss, is_on_off,
+                                       get_play_totals, get_userss,
+                                       is_on_off,
                                        is_served_private_chat)
 from YukkiMusic.utils.decorators.language import LanguageStart
 from YukkiMusic.utils.inline import (help_pannel, private_panel,
@@ -58,7 +58,7 @@ async def start_comm(client, message: Message, _):
                 "🔎 Fetching your personal stats.!"
             )
             stats = await get_userss(message.from_user.id)
-            tot = len(stats)
+            tot, tota = await get_play_totals(message.from_user.id)
             if not stats:
                 await asyncio.sleep(1)
                 return await m.edit(_["ustats_1"])
@@ -79,10 +79,8 @@ async def start_comm(client, message: Message, _):
                     )
                 if not results:
                     return m.edit(_["ustats_1"])
-                tota = 0
                 videoid = None
                 for vidid, count in list_arranged.items():
-                    tota += count
                     if limit == 10:
                         continue
                     if limit == 0:
@@ -133,19 +131,15 @@ async def start_comm(client, message: Message, _):
         if name[0:3] == "inf":
             m = await message.reply_text("🔎 Fetching Info!")
             query = (str(name)).replace("info_", "", 1)
-            query = f"https://www.youtube.com/watch?v={query}"
-            results = VideosSearch(query, limit=1)
-            for result in (await results.next())["result"]:
-                title = result["title"]
-                duration = result["duration"]
-                views = result["viewCount"]["short"]
-                thumbnail = result["thumbnails"][0]["url"].split("?")[
-                    0
-                ]
-                channellink = result["channel"]["link"]
-                channel = result["channel"]["name"]
-                link = result["link"]
-                published = result["publishedTime"]
+            result = await YouTube.search(query, True)
+            title = result["title"]
+            duration = result["duration"]
+            views = result["viewCount"]["short"]
+            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+            channellink = result["channel"]["link"]
+            channel = result["channel"]["name"]
+            link = result["link"]
+            published = result["publishedTime"]
             searched_text = f"""
 🔍__**Video Track Information**__
 
@@ -0,0 +1,16 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+
+import config
+from YukkiMusic.utils.stream.profile import stream_profiles
+
+if config.ADAPTIVE_BITRATE == str(True):
+    asyncio.create_task(stream_profiles.monitor())
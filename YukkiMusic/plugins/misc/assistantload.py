@@ -0,0 +1,35 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+
+import config
+from YukkiMusic import LOGGER
+from YukkiMusic.core.call import Yukki
+from YukkiMusic.utils.database import assistant_scheduler
+
+
+async def monitor_assistants():
+    while not await asyncio.sleep(config.ASSISTANT_MONITOR_INTERVAL):
+        try:
+            await Yukki.ping()
+        except:
+            pass
+        try:
+            moved = await assistant_scheduler.rebalance()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Assistant rebalance failed: {e}")
+            continue
+        if moved:
+            LOGGER(__name__).info(
+                f"Moved {moved} idle chats off unhealthy assistants."
+            )
+
+
+asyncio.create_task(monitor_assistants())
@@ -8,12 +8,12 @@
 # All rights reserved.
 
 import asyncio
-from datetime import datetime
 
 from pyrogram.enums import ChatType
 import config
 from YukkiMusic import app
-from YukkiMusic.core.call import Yukki, autoend
+from YukkiMusic.core.call import Yukki, membership
+from YukkiMusic.core.participants import participants
 from YukkiMusic.utils.database import (get_client, is_active_chat,
                                        is_autoend)
 
@@ -50,6 +50,7 @@ async def auto_leave():
                                         await client.leave_chat(
                                             chat_id
                                         )
+                                        membership.pop(chat_id)
                                         left += 1
                                     except:
                                         continue
@@ -61,29 +62,22 @@ asyncio.create_task(auto_leave())
 
 
 async def auto_end():
-    while not await asyncio.sleep(5):
+    async for chat_id in participants.expired():
         if not await is_autoend():
             continue
-        for chat_id in autoend:
-            timer = autoend.get(chat_id)
-            if not timer:
-                continue
-            if datetime.now() > timer:
-                if not await is_active_chat(chat_id):
-                    autoend[chat_id] = {}
-                    continue
-                autoend[chat_id] = {}
-                try:
-                    await Yukki.stop_stream(chat_id)
-                except:
-                    continue
-                try:
-                    await app.send_message(
-                        chat_id,
-                        "Bot has left voice chat due to inactivity to avoid overload on servers. No-one was listening to the bot on voice chat.",
-                    )
-                except:
-                    continue
+        if not await is_active_chat(chat_id):
+            continue
+        try:
+            await Yukki.stop_stream(chat_id)
+        except:
+            continue
+        try:
+            await app.send_message(
+                chat_id,
+                "Bot has left voice chat due to inactivity to avoid overload on servers. No-one was listening to the bot on voice chat.",
+            )
+        except:
+            continue
 
 
 asyncio.create_task(auto_end())
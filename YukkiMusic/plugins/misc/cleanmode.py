@@ -17,18 +17,16 @@ from pyrogram.errors import FloodWait
 from pyrogram.raw import types
 
 import config
-from config import adminlist, chatstats, clean, userstats
+from config import adminlist, clean
 from strings import get_command
 from YukkiMusic import app, userbot
 from YukkiMusic.misc import SUDOERS
 from YukkiMusic.utils.database import (get_active_chats,
                                        get_authuser_names, get_client,
-                                       get_particular_top,
                                        get_served_chats,
-                                       get_served_users, get_user_top,
-                                       is_cleanmode_on, set_queries,
-                                       update_particular_top,
-                                       update_user_top)
+                                       get_served_users,
+                                       is_cleanmode_on, play_stats,
+                                       set_queries)
 from YukkiMusic.utils.decorators.language import language
 from YukkiMusic.utils.formatters import alpha_to_int
 
@@ -200,47 +198,6 @@ async def braodcast_message(client, message, _):
 
 async def auto_clean():
     while not await asyncio.sleep(AUTO_SLEEP):
-        try:
-            for chat_id in chatstats:
-                for dic in chatstats[chat_id]:
-                    vidid = dic["vidid"]
-                    title = dic["title"]
-                    chatstats[chat_id].pop(0)
-                    spot = await get_particular_top(chat_id, vidid)
-                    if spot:
-                        spot = spot["spot"]
-                        next_spot = spot + 1
-                        new_spot = {"spot": next_spot, "title": title}
-                        await update_particular_top(
-                            chat_id, vidid, new_spot
-                        )
-                    else:
-                        next_spot = 1
-                        new_spot = {"spot": next_spot, "title": title}
-                        await update_particular_top(
-                            chat_id, vidid, new_spot
-                        )
-            for user_id in userstats:
-                for dic in userstats[user_id]:
-                    vidid = dic["vidid"]
-                    title = dic["title"]
-                    userstats[user_id].pop(0)
-                    spot = await get_user_top(user_id, vidid)
-                    if spot:
-                        spot = spot["spot"]
-                        next_spot = spot + 1
-                        new_spot = {"spot": next_spot, "title": title}
-                        await update_user_top(
-                            user_id, vidid, new_spot
-                        )
-                    else:
-                        next_spot = 1
-                        new_spot = {"spot": next_spot, "title": title}
-                        await update_user_top(
-                            user_id, vidid, new_spot
-                        )
-        except:
-            continue
         try:
             for chat_id in clean:
                 if chat_id == config.LOG_GROUP_ID:
@@ -279,3 +236,4 @@ async def auto_clean():
 
 
 asyncio.create_task(auto_clean())
+play_stats.start()
@@ -18,6 +18,7 @@ from YukkiMusic.utils.database import (get_active_chats, get_lang,
 from YukkiMusic.utils.formatters import seconds_to_min
 from YukkiMusic.utils.inline import (stream_markup_timer,
                                      telegram_markup_timer)
+from YukkiMusic.utils.stream.transition import transitions
 
 from ..admins.callback import wrong
 
@@ -40,6 +41,7 @@ async def timer():
             if duration == 0:
                 continue
             db[chat_id][0]["played"] += 1
+            transitions.prepare(chat_id, duration - db[chat_id][0]["played"])
 
 
 asyncio.create_task(timer())
@@ -15,6 +15,7 @@ import config
 from config import clean
 from strings import get_string
 from YukkiMusic import app
+from YukkiMusic.core.shard import is_local
 from YukkiMusic.utils.database import (get_lang,
                                        get_private_served_chats,
                                        get_served_chats,
@@ -52,6 +53,8 @@ async def dont_do_this():
                         break
                     if x == config.LOG_GROUP_ID:
                         continue
+                    if not is_local(x):
+                        continue
                     if not await is_suggestion(x):
                         continue
                     try:
@@ -180,15 +180,11 @@ async def play_commnd(
     elif url:
         if await YouTube.exists(url):
             if "playlist" in url:
-                try:
-                    details = await YouTube.playlist(
-                        url,
-                        config.PLAYLIST_FETCH_LIMIT,
-                        message.from_user.id,
-                    )
-                except Exception as e:
-                    print(e)
-                    return await mystic.edit_text(_["play_3"])
+                details = YouTube.iter_playlist(
+                    url,
+                    config.PLAYLIST_FETCH_LIMIT,
+                    message.from_user.id,
+                )
                 streamtype = "playlist"
                 plist_type = "yt"
                 if "&" in url:
@@ -640,15 +636,12 @@ async def play_playlists_command(client, CallbackQuery, _):
     spotify = True
     if ptype == "yt":
         spotify = False
-        try:
-            result = await YouTube.playlist(
-                videoid,
-                config.PLAYLIST_FETCH_LIMIT,
-                CallbackQuery.from_user.id,
-                True,
-            )
-        except Exception:
-            return await mystic.edit_text(_["play_3"])
+        result = YouTube.iter_playlist(
+            videoid,
+            config.PLAYLIST_FETCH_LIMIT,
+            CallbackQuery.from_user.id,
+            True,
+        )
     if ptype == "spplay":
         try:
             result, spotify_id = await Spotify.playlist(videoid)
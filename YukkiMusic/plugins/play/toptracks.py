@@ -14,8 +14,8 @@ from pyrogram.types import InlineKeyboardMarkup
 
 from config import BANNED_USERS
 from YukkiMusic import app
-from YukkiMusic.utils.database import (get_global_tops,
-                                       get_particulars, get_userss)
+from YukkiMusic.utils.database import (get_particulars, get_userss,
+                                       leaderboards)
 from YukkiMusic.utils.decorators.language import languageCB
 from YukkiMusic.utils.inline.playlist import (botplaylist_markup,
                                               failed_top_markup,
@@ -73,12 +73,13 @@ async def server_to_play(client, CallbackQuery, _):
         )
     )
     upl = failed_top_markup(_)
+    # One more than needed, telegram files are skipped below.
     if what == "Global":
-        stats = await get_global_tops()
+        stats = await leaderboards.tracks(11)
     elif what == "Group":
-        stats = await get_particulars(chat_id)
+        stats = await get_particulars(chat_id, 11)
     elif what == "Personal":
-        stats = await get_userss(CallbackQuery.from_user.id)
+        stats = await get_userss(CallbackQuery.from_user.id, 11)
     if not stats:
         return await mystic.edit(
             _["tracks_2"].format(what), reply_markup=upl
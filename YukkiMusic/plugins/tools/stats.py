@@ -9,6 +9,7 @@
 
 import asyncio
 import platform
+import time
 from sys import version as pyver
 
 import psutil
@@ -22,14 +23,15 @@ import config
 from config import BANNED_USERS, MUSIC_BOT_NAME
 from strings import get_command
 from YukkiMusic import YouTube, app
+from YukkiMusic.core.http import http
 from YukkiMusic.core.userbot import assistants
 from YukkiMusic.misc import SUDOERS, pymongodb
 from YukkiMusic.plugins import ALL_MODULES
-from YukkiMusic.utils.database import (get_global_tops,
-                                       get_particulars, get_queries,
+from YukkiMusic.utils.database import (get_particulars, get_play_totals,
+                                       get_queries,
                                        get_served_chats,
                                        get_served_users, get_sudoers,
-                                       get_top_chats, get_topp_users)
+                                       leaderboards)
 from YukkiMusic.utils.decorators.language import language, languageCB
 from YukkiMusic.utils.inline.stats import (back_stats_buttons,
                                            back_stats_markup,
@@ -43,6 +45,9 @@ loop = asyncio.get_running_loop()
 # Commands
 GSTATS_COMMAND = get_command("GSTATS_COMMAND")
 STATS_COMMAND = get_command("STATS_COMMAND")
+REBUILDSTATS_COMMAND = get_command("REBUILDSTATS_COMMAND")
+
+leaderboards.start()
 
 
 @app.on_message(
@@ -70,7 +75,7 @@ async def stats_global(client, message: Message, _):
 @language
 async def gstats_global(client, message: Message, _):
     mystic = await message.reply_text(_["gstats_1"])
-    stats = await get_global_tops()
+    stats = await leaderboards.tracks(2)
     if not stats:
         await asyncio.sleep(1)
         return await mystic.edit(_["gstats_2"])
@@ -126,6 +131,25 @@ async def gstats_global(client, message: Message, _):
     await mystic.delete()
 
 
+@app.on_message(filters.command(REBUILDSTATS_COMMAND) & SUDOERS)
+@language
+async def rebuild_stats(client, message: Message, _):
+    mystic = await message.reply_text(_["gstats_12"])
+    begin = time.monotonic()
+    try:
+        await leaderboards.rebuild()
+        await leaderboards.snapshot()
+    except Exception as e:
+        return await mystic.edit_text(f"{type(e).__name__}: {e}")
+    await mystic.edit_text(
+        _["gstats_13"].format(
+            round(time.monotonic() - begin, 2),
+            leaderboards.tracks_total,
+            leaderboards.plays_total,
+        )
+    )
+
+
 @app.on_callback_query(filters.regex("GetStatsNow") & ~BANNED_USERS)
 @languageCB
 async def top_users_ten(client, CallbackQuery: CallbackQuery, _):
@@ -144,14 +168,17 @@ async def top_users_ten(client, CallbackQuery: CallbackQuery, _):
             else what
         )
     )
+    # Chats and users are fetched with spares for the ones that can't be resolved.
     if what == "Tracks":
-        stats = await get_global_tops()
+        stats = await leaderboards.tracks()
+        tracks, plays = await leaderboards.totals()
     elif what == "Chats":
-        stats = await get_top_chats()
+        stats = await leaderboards.chats(20)
     elif what == "Users":
-        stats = await get_topp_users()
+        stats = await leaderboards.users(20)
     elif what == "Here":
         stats = await get_particulars(chat_id)
+        tracks, plays = await get_play_totals(chat_id)
     if not stats:
         await asyncio.sleep(1)
         return await mystic.edit(_["gstats_2"], reply_markup=upl)
@@ -177,10 +204,8 @@ async def top_users_ten(client, CallbackQuery: CallbackQuery, _):
             return mystic.edit(_["gstats_2"], reply_markup=upl)
         msg = ""
         limit = 0
-        total_count = 0
         if what in ["Tracks", "Here"]:
             for items, count in list_arranged.items():
-                total_count += count
                 if limit == 10:
                     continue
                 limit += 1
@@ -195,14 +220,12 @@ async def top_users_ten(client, CallbackQuery: CallbackQuery, _):
                 _["gstats_4"].format(
                     queries,
                     config.MUSIC_BOT_NAME,
-                    len(stats),
-                    total_count,
+                    tracks,
+                    plays,
                     limit,
                 )
                 if what == "Tracks"
-                else _["gstats_7"].format(
-                    len(stats), total_count, limit
-                )
+                else _["gstats_7"].format(tracks, plays, limit)
             )
             msg = temp + msg
         return msg, list_arranged
@@ -364,6 +387,9 @@ async def overall_stats(client, CallbackQuery, _):
     total_queries = await get_queries()
     blocked = len(BANNED_USERS)
     sudoers = len(await get_sudoers())
+    pools = http.stats().values()
+    http_conns = sum(pool["connections"] for pool in pools)
+    http_reqs = sum(pool["requests"] for pool in pools)
     text = f""" **Bot's Stats and Information:**
 
 **Imported Modules:** {mod}
@@ -393,6 +419,9 @@ async def overall_stats(client, CallbackQuery, _):
 **Total DB Keys:** {objects}
 **Total DB Queries:** `{query}`
 **Total Bot Queries:** `{total_queries} `
+
+**HTTP Connections:** {http_conns} open
+**HTTP Requests:** `{http_reqs}`
     """
     med = InputMediaPhoto(media=config.STATS_IMG_URL, caption=text)
     try:
@@ -0,0 +1,190 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+from YukkiMusic.logging import LOGGER
+
+SAVE_DELAY = 30
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one running job.
+
+    The job runs in its own task, so a caller that gets cancelled only stops
+    waiting; the job keeps going for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(
+        self, key: Hashable, job: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(job())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._done, key))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieve it so that a failure nobody waited for is not logged.
+            task.exception()
+
+
+class AsyncCache:
+    """TTL + LRU cache with single-flight fetches and optional JSON persistence."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        maxsize: int,
+        persist: bool = False,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._path = os.path.join("cache", f"{name}.json") if persist else None
+        self._save_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        if self._path:
+            self._load()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.time():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        if self._path:
+            self._schedule_save()
+
+    def expires_in(self, key: Hashable) -> float:
+        item = self._data.get(key)
+        return item[0] - time.time() if item else 0
+
+    def pop(self, key: Hashable) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: Union[float, Callable[[Any], float], None] = None,
+    ) -> Any:
+        """Return the cached value or fetch it once for all concurrent callers.
+
+        ``ttl`` may be a callable that derives the lifetime from the fetched value.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        async def fetch_and_store():
+            value = await fetcher()
+            if value is not None:
+                self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            return value
+
+        return await self._flight.do(key, fetch_and_store)
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Ignoring unreadable cache file {self._path}: {e}"
+            )
+            return
+        now = time.time()
+        for key, expires, value in stored:
+            if expires > now:
+                self._data[key] = (expires, value)
+        LOGGER(__name__).info(
+            f"Loaded {len(self._data)} entries into {self.name} cache."
+        )
+
+    def save(self):
+        if not self._path:
+            return
+        now = time.time()
+        stored = [
+            [key, expires, value]
+            for key, (expires, value) in self._data.items()
+            if expires > now and isinstance(key, str)
+        ]
+        tmp = f"{self._path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(stored, f)
+            os.replace(tmp, self._path)
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Failed to persist {self.name} cache: {e}"
+            )
+
+    def _schedule_save(self):
+        if self._save_task and not self._save_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.save()
+
+        async def delayed():
+            await asyncio.sleep(SAVE_DELAY)
+            self.save()
+
+        self._save_task = loop.create_task(delayed())
@@ -10,3 +10,4 @@
 from .assistantdatabase import *
 from .memorydatabase import *
 from .mongodatabase import *
+from .statsdatabase import *
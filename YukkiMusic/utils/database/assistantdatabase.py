@@ -8,38 +8,107 @@
 # All rights reserved.
 
 import random
+import time
+from dataclasses import dataclass, field
 
+import config
 from YukkiMusic import userbot
-from YukkiMusic.core.mongo import mongodb
 
-db = mongodb.assistants
+from .settingscache import settings_cache
 
 assistantdict = {}
 
 
+@dataclass
+class AssistantHealth:
+    floods: list = field(default_factory=list)
+    flood_until: float = 0
+    ping: float = 0
+
+
+class AssistantScheduler:
+    """Picks the least loaded healthy assistant for chats that have none yet.
+
+    Load is the number of active calls on an assistant, with video calls
+    weighing more, plus a penalty for recent FloodWaits and a slow ping.
+    """
+
+    FLOOD_WINDOW = 900
+    FLOOD_PENALTY = 3
+    VIDEO_WEIGHT = 2
+
+    def __init__(self, max_ping: float):
+        self.max_ping = max_ping
+        self.health: dict[int, AssistantHealth] = {}
+
+    def _health(self, assistant: int) -> AssistantHealth:
+        return self.health.setdefault(int(assistant), AssistantHealth())
+
+    def record_flood(self, assistant: int, seconds: int):
+        health = self._health(assistant)
+        now = time.time()
+        health.floods = [t for t in health.floods if now - t < self.FLOOD_WINDOW]
+        health.floods.append(now)
+        health.flood_until = max(health.flood_until, now + seconds)
+
+    def record_ping(self, assistant: int, ping: float):
+        self._health(assistant).ping = ping
+
+    def healthy(self, assistant: int) -> bool:
+        health = self._health(assistant)
+        if health.flood_until > time.time():
+            return False
+        return health.ping < self.max_ping
+
+    def load(self, assistant: int) -> float:
+        from .memorydatabase import active, activevideo
+
+        health = self._health(assistant)
+        now = time.time()
+        floods = sum(1 for t in health.floods if now - t < self.FLOOD_WINDOW)
+        calls = 0
+        for chat_id in active:
+            if assistantdict.get(chat_id) == assistant:
+                calls += self.VIDEO_WEIGHT if chat_id in activevideo else 1
+        return calls + floods * self.FLOOD_PENALTY + health.ping / self.max_ping
+
+    def pick(self) -> int:
+        from YukkiMusic.core.userbot import assistants
+
+        candidates = [num for num in assistants if self.healthy(num)] or assistants
+        lowest = min(self.load(num) for num in candidates)
+        return random.choice(
+            [num for num in candidates if self.load(num) == lowest]
+        )
+
+    async def rebalance(self) -> int:
+        """Move chats without a running call off unhealthy assistants."""
+        from YukkiMusic.core.userbot import assistants
+
+        from .memorydatabase import active
+
+        if not any(self.healthy(num) for num in assistants):
+            return 0
+        moved = 0
+        for chat_id, assistant in list(assistantdict.items()):
+            if chat_id in active or self.healthy(assistant):
+                continue
+            await set_calls_assistant(chat_id)
+            moved += 1
+        return moved
+
+
+assistant_scheduler = AssistantScheduler(config.ASSISTANT_MAX_PING)
+
+
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.clients.get(int(assistant))
 
 
 async def set_assistant(chat_id):
-    from YukkiMusic.core.userbot import assistants
-
-    ran_assistant = random.choice(assistants)
+    ran_assistant = assistant_scheduler.pick()
     assistantdict[chat_id] = ran_assistant
-    await db.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await settings_cache.set_chat(chat_id, "assistant", ran_assistant)
     userbot = await get_client(ran_assistant)
     return userbot
 
@@ -49,12 +118,11 @@ async def get_assistant(chat_id: int) -> str:
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
-        dbassistant = await db.find_one({"chat_id": chat_id})
-        if not dbassistant:
+        got_assis = await settings_cache.get_chat(chat_id, "assistant")
+        if not got_assis:
             userbot = await set_assistant(chat_id)
             return userbot
         else:
-            got_assis = dbassistant["assistant"]
             if got_assis in assistants:
                 assistantdict[chat_id] = got_assis
                 userbot = await get_client(got_assis)
@@ -72,15 +140,9 @@ async def get_assistant(chat_id: int) -> str:
 
 
 async def set_calls_assistant(chat_id):
-    from YukkiMusic.core.userbot import assistants
-
-    ran_assistant = random.choice(assistants)
+    ran_assistant = assistant_scheduler.pick()
     assistantdict[chat_id] = ran_assistant
-    await db.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await settings_cache.set_chat(chat_id, "assistant", ran_assistant)
     return ran_assistant
 
 
@@ -89,11 +151,10 @@ async def group_assistant(self, chat_id: int) -> int:
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
-        dbassistant = await db.find_one({"chat_id": chat_id})
-        if not dbassistant:
+        assis = await settings_cache.get_chat(chat_id, "assistant")
+        if not assis:
             assis = await set_calls_assistant(chat_id)
         else:
-            assis = dbassistant["assistant"]
             if assis in assistants:
                 assistantdict[chat_id] = assis
                 assis = assis
@@ -104,13 +165,4 @@ async def group_assistant(self, chat_id: int) -> int:
             assis = assistant
         else:
             assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    return self.calls[int(assis)]
@@ -12,25 +12,22 @@ import config
 from config import PRIVATE_BOT_MODE
 from YukkiMusic.core.mongo import mongodb
 
-channeldb = mongodb.cplaymode
+from .settingscache import Setting, settings_cache
+
 commanddb = mongodb.commands
 cleandb = mongodb.cleanmode
-playmodedb = mongodb.playmode
-playtypedb = mongodb.playtypedb
-langdb = mongodb.language
-authdb = mongodb.adminauth
 videodb = mongodb.yukkivideocalls
 onoffdb = mongodb.onoffper
-suggdb = mongodb.suggestion
 autoenddb = mongodb.autoend
 
+# Bot-wide settings, per-chat ones are fields of the chat settings document.
+AUTOEND = Setting("autoend", autoenddb, False)
+VIDEO_LIMIT = Setting("vlimit", videodb, config.VIDEO_STREAM_LIMIT, "limit")
+ON_OFF = Setting("on_off", onoffdb, False, key="on_off")
+
 
 # Shifting to memory [ mongo sucks often]
 loop = {}
-playtype = {}
-playmode = {}
-channelconnect = {}
-langm = {}
 pause = {}
 mute = {}
 audio = {}
@@ -39,72 +36,46 @@ active = []
 activevideo = []
 command = []
 cleanmode = []
-nonadmin = {}
-vlimit = []
-maintenance = []
-suggestion = {}
-autoend = {}
 
 
 # Auto End Stream
 
 
 async def is_autoend() -> bool:
-    chat_id = 123
-    mode = autoend.get(chat_id)
-    if not mode:
-        user = await autoenddb.find_one({"chat_id": chat_id})
-        if not user:
-            autoend[chat_id] = False
-            return False
-        autoend[chat_id] = True
-        return True
-    return mode
+    return await settings_cache.get(AUTOEND, 123)
 
 
 async def autoend_on():
     chat_id = 123
-    autoend[chat_id] = True
+    settings_cache.set(AUTOEND, chat_id, True)
     user = await autoenddb.find_one({"chat_id": chat_id})
     if not user:
-        return await autoenddb.insert_one({"chat_id": chat_id})
+        await autoenddb.insert_one({"chat_id": chat_id})
+    await settings_cache.publish(AUTOEND, chat_id)
 
 
 async def autoend_off():
     chat_id = 123
-    autoend[chat_id] = False
+    settings_cache.set(AUTOEND, chat_id, False)
     user = await autoenddb.find_one({"chat_id": chat_id})
     if user:
-        return await autoenddb.delete_one({"chat_id": chat_id})
+        await autoenddb.delete_one({"chat_id": chat_id})
+    await settings_cache.publish(AUTOEND, chat_id)
 
 
 # SUGGESTION
 
 
 async def is_suggestion(chat_id: int) -> bool:
-    mode = suggestion.get(chat_id)
-    if not mode:
-        user = await suggdb.find_one({"chat_id": chat_id})
-        if not user:
-            suggestion[chat_id] = True
-            return True
-        suggestion[chat_id] = False
-        return False
-    return mode
+    return await settings_cache.get_chat(chat_id, "suggestion", True)
 
 
 async def suggestion_on(chat_id: int):
-    suggestion[chat_id] = True
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if user:
-        return await suggdb.delete_one({"chat_id": chat_id})
+    await settings_cache.set_chat(chat_id, "suggestion", True)
 
 
 async def suggestion_off(chat_id: int):
-    suggestion[chat_id] = False
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await suggdb.insert_one({"chat_id": chat_id})
+    await settings_cache.set_chat(chat_id, "suggestion", False)
 
 
 # LOOP PLAY
@@ -121,81 +92,38 @@ async def set_loop(chat_id: int, mode: int):
 
 # Channel Play IDS
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await settings_cache.get_chat(chat_id, "cmode")
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await settings_cache.set_chat(chat_id, "cmode", mode)
 
 
 # PLAY TYPE WHETHER ADMINS ONLY OR EVERYONE
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await settings_cache.get_chat(chat_id, "playtype", "Everyone")
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await settings_cache.set_chat(chat_id, "playtype", mode)
 
 
 # play mode whether inline or direct query
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await settings_cache.get_chat(chat_id, "playmode", "Direct")
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await settings_cache.set_chat(chat_id, "playmode", mode)
 
 
 # language
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return await settings_cache.get_chat(chat_id, "lang", "en")
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True
-    )
+    await settings_cache.set_chat(chat_id, "lang", lang)
 
 
 # Muted
@@ -316,55 +244,24 @@ async def cleanmode_on(chat_id: int):
 
 # Non Admin Chat
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await settings_cache.get_chat(chat_id, "nonadmin", False)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return await settings_cache.get_chat(chat_id, "nonadmin", False)
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    await settings_cache.set_chat(chat_id, "nonadmin", True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    await settings_cache.set_chat(chat_id, "nonadmin", False)
 
 
 # Video Limit
 async def is_video_allowed(chat_idd) -> str:
-    chat_id = 123456
-    if not vlimit:
-        dblimit = await videodb.find_one({"chat_id": chat_id})
-        if not dblimit:
-            vlimit.clear()
-            vlimit.append(config.VIDEO_STREAM_LIMIT)
-            limit = config.VIDEO_STREAM_LIMIT
-        else:
-            limit = dblimit["limit"]
-            vlimit.clear()
-            vlimit.append(limit)
-    else:
-        limit = vlimit[0]
+    limit = await get_video_limit()
     if limit == 0:
         return False
     count = len(await get_active_video_chats())
@@ -375,86 +272,52 @@ async def is_video_allowed(chat_idd) -> str:
 
 
 async def get_video_limit() -> str:
-    chat_id = 123456
-    if not vlimit:
-        dblimit = await videodb.find_one({"chat_id": chat_id})
-        if not dblimit:
-            limit = config.VIDEO_STREAM_LIMIT
-        else:
-            limit = dblimit["limit"]
-    else:
-        limit = vlimit[0]
-    return limit
+    return await settings_cache.get(VIDEO_LIMIT, 123456)
 
 
 async def set_video_limit(limt: int):
     chat_id = 123456
-    vlimit.clear()
-    vlimit.append(limt)
-    return await videodb.update_one(
+    settings_cache.set(VIDEO_LIMIT, chat_id, limt)
+    await videodb.update_one(
         {"chat_id": chat_id}, {"$set": {"limit": limt}}, upsert=True
     )
+    await settings_cache.publish(VIDEO_LIMIT, chat_id)
 
 
 # On Off
 async def is_on_off(on_off: int) -> bool:
-    onoff = await onoffdb.find_one({"on_off": on_off})
-    if not onoff:
-        return False
-    return True
+    return await settings_cache.get(ON_OFF, on_off)
 
 
 async def add_on(on_off: int):
     is_on = await is_on_off(on_off)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": on_off})
+    settings_cache.set(ON_OFF, on_off, True)
+    if not is_on:
+        await onoffdb.insert_one({"on_off": on_off})
+    await settings_cache.publish(ON_OFF, on_off)
 
 
 async def add_off(on_off: int):
     is_off = await is_on_off(on_off)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": on_off})
+    settings_cache.set(ON_OFF, on_off, False)
+    if is_off:
+        await onoffdb.delete_one({"on_off": on_off})
+    await settings_cache.publish(ON_OFF, on_off)
 
 
 # Maintenance
 
 
 async def is_maintenance():
-    if not maintenance:
-        get = await onoffdb.find_one({"on_off": 1})
-        if not get:
-            maintenance.clear()
-            maintenance.append(2)
-            return True
-        else:
-            maintenance.clear()
-            maintenance.append(1)
-            return False
-    else:
-        if 1 in maintenance:
-            return False
-        else:
-            return True
+    return not await is_on_off(1)
 
 
 async def maintenance_off():
-    maintenance.clear()
-    maintenance.append(2)
-    is_off = await is_on_off(1)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": 1})
+    return await add_off(1)
 
 
 async def maintenance_on():
-    maintenance.clear()
-    maintenance.append(1)
-    is_on = await is_on_off(1)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": 1})
+    return await add_on(1)
 
 
 # Audio Video Limit
@@ -468,11 +331,17 @@ from pytgcalls.types.input_stream.quality import (HighQualityAudio,
 
 
 async def save_audio_bitrate(chat_id: int, bitrate: str):
+    from YukkiMusic.utils.stream.profile import stream_profiles
+
     audio[chat_id] = bitrate
+    stream_profiles.invalidate(chat_id)
 
 
 async def save_video_bitrate(chat_id: int, bitrate: str):
+    from YukkiMusic.utils.stream.profile import stream_profiles
+
     video[chat_id] = bitrate
+    stream_profiles.invalidate(chat_id)
 
 
 async def get_aud_bit_name(chat_id: int) -> str:
@@ -9,7 +9,12 @@
 
 from typing import Dict, List, Union
 
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
 from YukkiMusic.core.mongo import mongodb
+from YukkiMusic.core.shard import broadcast
+from YukkiMusic.logging import LOGGER
 
 queriesdb = mongodb.queries
 userdb = mongodb.userstats
@@ -21,6 +26,8 @@ chatsdb = mongodb.chats
 blacklist_chatdb = mongodb.blacklistChat
 usersdb = mongodb.tgusersdb
 playlistdb = mongodb.playlist
+playcountdb = mongodb.playcounts
+leaderboarddb = mongodb.leaderboards
 blockeddb = mongodb.blockedusers
 privatedb = mongodb.privatechats
 
@@ -249,14 +256,16 @@ async def add_gban_user(user_id: int):
     is_gbanned = await is_gbanned_user(user_id)
     if is_gbanned:
         return
-    return await gbansdb.insert_one({"user_id": user_id})
+    await gbansdb.insert_one({"user_id": user_id})
+    await broadcast("banned", user_id, True)
 
 
 async def remove_gban_user(user_id: int):
     is_gbanned = await is_gbanned_user(user_id)
     if not is_gbanned:
         return
-    return await gbansdb.delete_one({"user_id": user_id})
+    await gbansdb.delete_one({"user_id": user_id})
+    await broadcast("banned", user_id, False)
 
 
 # Sudoers
@@ -275,6 +284,7 @@ async def add_sudo(user_id: int) -> bool:
     await sudoersdb.update_one(
         {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
     )
+    await broadcast("sudoer", user_id, True)
     return True
 
 
@@ -284,6 +294,7 @@ async def remove_sudo(user_id: int) -> bool:
     await sudoersdb.update_one(
         {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
     )
+    await broadcast("sudoer", user_id, False)
     return True
 
 
@@ -308,98 +319,131 @@ async def set_queries(mode: int):
     )
 
 
-# Top Chats DB
+# Top Tracks DB
+# One document per scope and track: scope is the chat ID (negative) or user
+# ID (positive) the plays were counted for.
 
 
-async def get_top_chats() -> dict:
+async def prepare_top_tracks():
+    await playcountdb.create_index(
+        [("scope", 1), ("vidid", 1)], unique=True
+    )
+    await playcountdb.create_index([("scope", 1), ("spot", -1)])
+    await migrate_top_tracks()
+
+
+async def migrate_top_tracks():
+    """Move play counts out of the old per-chat and per-user vidid maps.
+
+    Every track is marked as migrated together with its increment, so a
+    restart before the old document is deleted does not count it twice.
+    """
+    moved = 0
+    for collection in (chattopdb, userdb):
+        async for document in collection.find({"vidid": {"$exists": True}}):
+            operations = [
+                UpdateOne(
+                    {
+                        "scope": document["chat_id"],
+                        "vidid": vidid,
+                        "migrated": {"$ne": True},
+                    },
+                    {
+                        "$inc": {"spot": track.get("spot", 0)},
+                        "$set": {"title": track.get("title", ""), "migrated": True},
+                    },
+                    upsert=True,
+                )
+                for vidid, track in (document["vidid"] or {}).items()
+                if track.get("spot", 0) > 0
+            ]
+            if operations:
+                try:
+                    await playcountdb.bulk_write(operations, ordered=False)
+                except BulkWriteError as e:
+                    # Tracks migrated before a restart match no document and
+                    # their upsert hits the unique index; skip those.
+                    if any(
+                        error.get("code") != 11000
+                        for error in e.details.get("writeErrors", [])
+                    ):
+                        raise
+            await collection.delete_one({"_id": document["_id"]})
+            moved += 1
+    if moved:
+        LOGGER(__name__).info(f"Migrated top tracks of {moved} chats and users.")
+
+
+async def _top_tracks(scope: dict, limit: int) -> dict:
     results = {}
-    async for chat in chattopdb.find({"chat_id": {"$lt": 0}}):
-        chat_id = chat["chat_id"]
-        total = 0
-        for i in chat["vidid"]:
-            counts_ = chat["vidid"][i]["spot"]
-            if counts_ > 0:
-                total += counts_
-                results[chat_id] = total
+    pipeline = [
+        {"$match": {"scope": scope}},
+        {
+            "$group": {
+                "_id": "$vidid",
+                "spot": {"$sum": "$spot"},
+                "title": {"$first": "$title"},
+            }
+        },
+        {"$sort": {"spot": -1}},
+        {"$limit": limit},
+    ]
+    async for track in playcountdb.aggregate(pipeline):
+        results[track["_id"]] = {"spot": track["spot"], "title": track["title"]}
     return results
 
 
-async def get_global_tops() -> dict:
+async def _top_scopes(scope: dict, limit: int) -> dict:
     results = {}
-    async for chat in chattopdb.find({"chat_id": {"$lt": 0}}):
-        for i in chat["vidid"]:
-            counts_ = chat["vidid"][i]["spot"]
-            title_ = chat["vidid"][i]["title"]
-            if counts_ > 0:
-                if i not in results:
-                    results[i] = {}
-                    results[i]["spot"] = counts_
-                    results[i]["title"] = title_
-                else:
-                    spot = results[i]["spot"]
-                    count_ = spot + counts_
-                    results[i]["spot"] = count_
+    pipeline = [
+        {"$match": {"scope": scope}},
+        {"$group": {"_id": "$scope", "spot": {"$sum": "$spot"}}},
+        {"$sort": {"spot": -1}},
+        {"$limit": limit},
+    ]
+    async for owner in playcountdb.aggregate(pipeline):
+        results[owner["_id"]] = owner["spot"]
     return results
 
 
-async def get_particulars(chat_id: int) -> Dict[str, int]:
-    ids = await chattopdb.find_one({"chat_id": chat_id})
-    if not ids:
-        return {}
-    return ids["vidid"]
+async def get_play_totals(scope: Union[int, dict, None] = None) -> tuple:
+    """Number of distinct tracks and total plays of a chat or user, or of all chats."""
+    scope = {"$lt": 0} if scope is None else scope
+    pipeline = [
+        {"$match": {"scope": scope}},
+        {"$group": {"_id": "$vidid", "spot": {"$sum": "$spot"}}},
+        {"$group": {"_id": None, "tracks": {"$sum": 1}, "spot": {"$sum": "$spot"}}},
+    ]
+    async for totals in playcountdb.aggregate(pipeline):
+        return totals["tracks"], totals["spot"]
+    return 0, 0
 
 
-async def get_particular_top(
-    chat_id: int, name: str
-) -> Union[bool, dict]:
-    ids = await get_particulars(chat_id)
-    if name in ids:
-        return ids[name]
+async def get_top_chats(limit: int = 10) -> dict:
+    return await _top_scopes({"$lt": 0}, limit)
 
 
-async def update_particular_top(chat_id: int, name: str, vidid: dict):
-    ids = await get_particulars(chat_id)
-    ids[name] = vidid
-    await chattopdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"vidid": ids}}, upsert=True
-    )
-
-
-# Top User DB
+async def get_global_tops(limit: int = 10) -> dict:
+    return await _top_tracks({"$lt": 0}, limit)
 
 
-async def get_userss(chat_id: int) -> Dict[str, int]:
-    ids = await userdb.find_one({"chat_id": chat_id})
-    if not ids:
-        return {}
-    return ids["vidid"]
+async def get_particulars(chat_id: int, limit: int = 10) -> Dict[str, dict]:
+    results = {}
+    cursor = playcountdb.find({"scope": chat_id}).sort("spot", -1).limit(limit)
+    async for track in cursor:
+        results[track["vidid"]] = {"spot": track["spot"], "title": track["title"]}
+    return results
 
 
-async def get_user_top(chat_id: int, name: str) -> Union[bool, dict]:
-    ids = await get_userss(chat_id)
-    if name in ids:
-        return ids[name]
+# Top User DB
 
 
-async def update_user_top(chat_id: int, name: str, vidid: dict):
-    ids = await get_userss(chat_id)
-    ids[name] = vidid
-    await userdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"vidid": ids}}, upsert=True
-    )
+async def get_userss(chat_id: int, limit: int = 10) -> Dict[str, dict]:
+    return await get_particulars(chat_id, limit)
 
 
-async def get_topp_users() -> dict:
-    results = {}
-    async for chat in userdb.find({"chat_id": {"$gt": 0}}):
-        user_id = chat["chat_id"]
-        total = 0
-        for i in chat["vidid"]:
-            counts_ = chat["vidid"][i]["spot"]
-            if counts_ > 0:
-                total += counts_
-        results[user_id] = total
-    return results
+async def get_topp_users(limit: int = 10) -> dict:
+    return await _top_scopes({"$gt": 0}, limit)
 
 
 # Gban Users
@@ -430,11 +474,13 @@ async def add_banned_user(user_id: int):
     is_gbanned = await is_banned_user(user_id)
     if is_gbanned:
         return
-    return await blockeddb.insert_one({"user_id": user_id})
+    await blockeddb.insert_one({"user_id": user_id})
+    await broadcast("banned", user_id, True)
 
 
 async def remove_banned_user(user_id: int):
     is_gbanned = await is_banned_user(user_id)
     if not is_gbanned:
         return
-    return await blockeddb.delete_one({"user_id": user_id})
+    await blockeddb.delete_one({"user_id": user_id})
+    await broadcast("banned", user_id, False)
@@ -0,0 +1,248 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import config
+from YukkiMusic.core.mongo import mongodb
+from YukkiMusic.core.shard import broadcast, is_local, on_event
+from YukkiMusic.logging import LOGGER
+from YukkiMusic.utils.cache import AsyncCache
+
+# All settings of a chat live in one document:
+# {chat_id, cmode, playtype, playmode, lang, nonadmin, suggestion, assistant, seen}
+chatsettingsdb = mongodb.chatsettings
+migrationsdb = mongodb.migrations
+
+# Collections that held one chat setting each, with the field of the
+# settings document they move to and how the value is read from them.
+LEGACY_SETTINGS = [
+    ("cplaymode", "cmode", lambda doc: doc.get("mode")),
+    ("playtypedb", "playtype", lambda doc: doc.get("mode")),
+    ("playmode", "playmode", lambda doc: doc.get("mode")),
+    ("language", "lang", lambda doc: doc.get("lang")),
+    ("adminauth", "nonadmin", lambda doc: True),
+    ("suggestion", "suggestion", lambda doc: False),
+    ("assistants", "assistant", lambda doc: doc.get("assistant")),
+]
+
+PREFETCH_BATCH = 1000
+MIGRATION_POLL = 1
+
+# Stored for global settings whose document does not exist, so the default
+# is not looked up again on every call.
+_ABSENT = "__absent__"
+
+
+@dataclass(frozen=True)
+class Setting:
+    """A bot-wide setting stored as its own document in a collection.
+
+    With ``field`` set the value is read from that field of the document;
+    without it the setting is a flag that is on while the document exists.
+    """
+
+    name: str
+    collection: Any
+    default: Any = None
+    field: Optional[str] = None
+    key: str = "chat_id"
+
+
+class SettingsCache:
+    """Read-through cache of chat settings documents and bot-wide settings.
+
+    A chat's settings are loaded with one query and cached as a whole, chats
+    without a document are cached as empty, the least recently used chats
+    are dropped past ``maxsize`` and entries expire after ``ttl`` so changes
+    made by another shard are picked up.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._cache = AsyncCache("settings", ttl, maxsize)
+        # Writes seen per chat while its document is being loaded.
+        self._loading: dict[int, int] = {}
+
+    async def chat(self, chat_id: int) -> dict:
+        return await self._cache.get_or_fetch(
+            chat_id, partial(self._load_chat, chat_id)
+        )
+
+    async def _load_chat(self, chat_id: int) -> dict:
+        self._loading[chat_id] = 0
+        try:
+            while True:
+                # Marking the chat as seen costs no extra round trip.
+                doc = await chatsettingsdb.find_one_and_update(
+                    {"chat_id": chat_id},
+                    {"$set": {"seen": time.time()}},
+                    projection={"_id": 0},
+                )
+                if not self._loading[chat_id]:
+                    return self._hydrate(chat_id, doc or {})
+                self._loading[chat_id] = 0
+        finally:
+            del self._loading[chat_id]
+
+    @staticmethod
+    def _hydrate(chat_id: int, settings: dict) -> dict:
+        from .assistantdatabase import assistantdict
+
+        if settings.get("assistant") and chat_id not in assistantdict:
+            assistantdict[chat_id] = settings["assistant"]
+        return settings
+
+    async def get_chat(self, chat_id: int, name: str, default: Any = None) -> Any:
+        value = (await self.chat(chat_id)).get(name)
+        return default if value is None else value
+
+    async def set_chat(self, chat_id: int, name: str, value: Any):
+        await chatsettingsdb.update_one(
+            {"chat_id": chat_id}, {"$set": {name: value}}, upsert=True
+        )
+        settings = self._cache.get(chat_id)
+        if settings is not None:
+            settings[name] = value
+        if chat_id in self._loading:
+            self._loading[chat_id] += 1
+        await broadcast("chat_settings", chat_id)
+
+    async def prefetch(self, since: float) -> int:
+        """Load the settings of every chat of this shard seen after ``since``."""
+        loaded = 0
+        cursor = chatsettingsdb.find(
+            {"seen": {"$gte": since}}, {"_id": 0}
+        ).sort("seen", -1)
+        async for doc in cursor.batch_size(PREFETCH_BATCH):
+            if loaded >= self._cache.maxsize:
+                break
+            chat_id = doc["chat_id"]
+            if not is_local(chat_id) or chat_id in self._cache:
+                continue
+            # Assistants are only looked up once the chat is used, so the
+            # rebalancer does not walk every prefetched chat.
+            self._cache.set(chat_id, doc)
+            loaded += 1
+        return loaded
+
+    async def get(self, setting: Setting, key: int) -> Any:
+        cache_key = (setting.name, key)
+        value = await self._cache.get_or_fetch(
+            cache_key, partial(self._fetch, setting, key, cache_key)
+        )
+        return setting.default if value == _ABSENT else value
+
+    async def _fetch(self, setting: Setting, key: int, cache_key: tuple) -> Any:
+        doc = await setting.collection.find_one({setting.key: key})
+        written = self._cache.get(cache_key)
+        if written is not None:
+            # A writer finished while the document was being read.
+            return written
+        if setting.field is None:
+            return doc is not None
+        if not doc or doc.get(setting.field) is None:
+            return _ABSENT
+        return doc[setting.field]
+
+    def set(self, setting: Setting, key: int, value: Any):
+        self._cache.set((setting.name, key), _ABSENT if value is None else value)
+
+    async def publish(self, setting: Setting, key: int):
+        """Make the other shards read a setting again after it was written."""
+        await broadcast("setting", setting.name, key)
+
+    def forget(self, setting_name: str, key: int):
+        self._cache.pop((setting_name, key))
+
+    def forget_chat(self, chat_id: int):
+        self._cache.pop(chat_id)
+        if chat_id in self._loading:
+            self._loading[chat_id] += 1
+
+
+settings_cache = SettingsCache(config.SETTINGS_CACHE_TTL, config.SETTINGS_CACHE_SIZE)
+
+
+@on_event("chat_settings")
+def _sync_chat_settings(chat_id: int):
+    settings_cache.forget_chat(chat_id)
+
+
+@on_event("setting")
+def _sync_setting(name: str, key: int):
+    settings_cache.forget(name, key)
+
+
+async def prepare_chat_settings():
+    await chatsettingsdb.create_index("chat_id", unique=True)
+    await chatsettingsdb.create_index("seen")
+    await migrate_chat_settings()
+    await migrationsdb.update_one(
+        {"_id": "chatsettings"}, {"$set": {"done": time.time()}}, upsert=True
+    )
+
+
+async def wait_chat_settings(timeout: float) -> bool:
+    """Wait until the first shard has migrated the chat settings."""
+    deadline = time.monotonic() + timeout
+    while not await migrationsdb.find_one({"_id": "chatsettings"}):
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(MIGRATION_POLL)
+    return True
+
+
+async def migrate_chat_settings():
+    """Move chat settings out of the old one-collection-per-setting layout."""
+    for name, field, read in LEGACY_SETTINGS:
+        collection = mongodb[name]
+        moved = 0
+        operations, migrated = [], []
+        async for doc in collection.find({"chat_id": {"$exists": True}}):
+            value = read(doc)
+            if value is not None:
+                # A value already written by the new layout is newer.
+                operations.append(
+                    UpdateOne(
+                        {"chat_id": doc["chat_id"], field: {"$exists": False}},
+                        {"$set": {field: value}},
+                        upsert=True,
+                    )
+                )
+            migrated.append(doc["_id"])
+            if len(migrated) >= PREFETCH_BATCH:
+                moved += await _move(collection, operations, migrated)
+                operations, migrated = [], []
+        moved += await _move(collection, operations, migrated)
+        if moved:
+            LOGGER(__name__).info(f"Migrated {moved} chat settings from {name}.")
+
+
+async def _move(collection, operations: list, migrated: list) -> int:
+    if operations:
+        try:
+            await chatsettingsdb.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # The upsert of a chat that already has the field hits the
+            # unique chat_id index, anything else is a real failure.
+            if any(
+                error.get("code") != 11000
+                for error in e.details.get("writeErrors", [])
+            ):
+                raise
+    if migrated:
+        await collection.delete_many({"_id": {"$in": migrated}})
+    return len(migrated)
@@ -0,0 +1,304 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import heapq
+import time
+from typing import Callable, Hashable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import config
+from YukkiMusic.logging import LOGGER
+
+from .mongodatabase import (get_global_tops, get_play_totals,
+                            get_top_chats, get_topp_users, leaderboarddb,
+                            playcountdb)
+
+LEADERBOARD_SIZE = 50
+SNAPSHOT_INTERVAL = 60
+
+
+class PlayStats:
+    """Write-behind play counters for the top tracks of chats and users.
+
+    Plays are summed in memory per (scope, vidid) and written every
+    ``interval`` seconds as ``$inc`` upserts in a single unordered
+    ``bulk_write``, so concurrent writers never overwrite each other's counts.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: dict[tuple[int, str], list] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, chat_id: int, user_id: int, vidid: str, title: str):
+        vidid = "telegram" if vidid == "soundcloud" else vidid
+        for scope in (chat_id, user_id):
+            count = self._pending.get((scope, vidid))
+            self._pending[(scope, vidid)] = [count[0] + 1 if count else 1, title]
+        leaderboards.record(chat_id, user_id, vidid, title)
+
+    def _restore(self, pending: dict):
+        for key, (spot, title) in pending.items():
+            if key in self._pending:
+                self._pending[key][0] += spot
+            else:
+                self._pending[key] = [spot, title]
+
+    async def flush(self, swapped: Optional[Callable[[], None]] = None):
+        """Write the buffered counts.
+
+        ``swapped`` is called as soon as the counts being written are taken
+        out of the buffer, so later plays can be told apart.
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if swapped:
+                swapped()
+            if not pending:
+                return
+            keys = list(pending)
+            operations = [
+                UpdateOne(
+                    {"scope": scope, "vidid": vidid},
+                    {
+                        "$inc": {"spot": pending[(scope, vidid)][0]},
+                        "$set": {"title": pending[(scope, vidid)][1]},
+                    },
+                    upsert=True,
+                )
+                for scope, vidid in keys
+            ]
+            try:
+                await playcountdb.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                self._restore(
+                    {
+                        keys[error["index"]]: pending[keys[error["index"]]]
+                        for error in e.details.get("writeErrors", [])
+                    }
+                )
+                LOGGER(__name__).warning(f"Failed to write some play stats: {e}")
+            except Exception as e:
+                # Counts are kept and sent again with the next flush.
+                self._restore(pending)
+                LOGGER(__name__).warning(f"Failed to write play stats: {e}")
+
+    async def run(self):
+        while not await asyncio.sleep(self.interval):
+            # Shielded so shutdown waits for a running flush instead of losing it.
+            await asyncio.shield(self.flush())
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+class Leaderboard:
+    """Top ``size`` keys of one ranking, kept sorted as plays come in.
+
+    Keys that were not in the last rebuild start from the plays seen since,
+    a lower bound of their real count until the next rebuild.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.scores: dict[Hashable, list] = {}
+        self._top: list = []
+
+    def load(self, entries):
+        self.scores = {key: [spot, title] for key, spot, title in entries}
+        self._top = heapq.nlargest(
+            self.size, self.scores, key=lambda key: self.scores[key][0]
+        )
+
+    def add(self, key: Hashable, title: Optional[str] = None):
+        if key not in self.scores and len(self.scores) >= 20 * self.size:
+            keep = set(self._top).union(
+                heapq.nlargest(
+                    10 * self.size, self.scores, key=lambda key: self.scores[key][0]
+                )
+            )
+            self.scores = {key: self.scores[key] for key in keep}
+        score = self.scores.setdefault(key, [0, title])
+        score[0] += 1
+        if title:
+            score[1] = title
+        if key not in self._top:
+            if (
+                len(self._top) >= self.size
+                and score[0] <= self.scores[self._top[-1]][0]
+            ):
+                return
+            self._top.append(key)
+        self._top.sort(key=lambda key: self.scores[key][0], reverse=True)
+        del self._top[self.size :]
+
+    def top(self, limit: int) -> list[tuple]:
+        return [(key, *self.scores[key]) for key in self._top[:limit]]
+
+
+class Leaderboards:
+    """Global top tracks, chats and users served from memory.
+
+    The boards are rebuilt from the play counts collection whenever they are
+    older than ``max_age`` seconds and follow the plays recorded by this
+    process in between. They are snapshotted to the database, so a restart
+    picks them up instead of aggregating again.
+    """
+
+    def __init__(self, size: int, max_age: float):
+        self.max_age = max_age
+        self.boards = {
+            "tracks": Leaderboard(size),
+            "chats": Leaderboard(size),
+            "users": Leaderboard(size),
+        }
+        # Only refreshed by rebuilds, new tracks are not counted in between.
+        self.tracks_total = 0
+        self.plays_total = 0
+        self.built = 0.0
+        self._lock = asyncio.Lock()
+        # Plays recorded while a rebuild reads the collection without them.
+        self._replay: Optional[list] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, chat_id: int, user_id: int, vidid: str, title: str):
+        if self._replay is not None:
+            self._replay.append((chat_id, user_id, vidid, title))
+        self._apply(chat_id, user_id, vidid, title)
+
+    def _apply(self, chat_id: int, user_id: int, vidid: str, title: str):
+        if chat_id < 0:
+            self.boards["tracks"].add(vidid, title)
+            self.boards["chats"].add(chat_id)
+            self.plays_total += 1
+        if user_id > 0:
+            self.boards["users"].add(user_id)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.built > self.max_age
+
+    async def rebuild(self, force: bool = True):
+        async with self._lock:
+            if not force and not self.stale:
+                return
+            await play_stats.flush(swapped=self._start_replay)
+            try:
+                size = self.boards["tracks"].size
+                tracks = await get_global_tops(size)
+                chats = await get_top_chats(size)
+                users = await get_topp_users(size)
+                totals = await get_play_totals()
+            except:
+                self._replay = None
+                raise
+            self.tracks_total, self.plays_total = totals
+            self.boards["tracks"].load(
+                (vidid, track["spot"], track["title"])
+                for vidid, track in tracks.items()
+            )
+            self.boards["chats"].load(
+                (chat_id, spot, None) for chat_id, spot in chats.items()
+            )
+            self.boards["users"].load(
+                (user_id, spot, None) for user_id, spot in users.items()
+            )
+            replay, self._replay = self._replay, None
+            for play in replay:
+                self._apply(*play)
+            self.built = time.time()
+
+    def _start_replay(self):
+        self._replay = []
+
+    async def snapshot(self):
+        await leaderboarddb.update_one(
+            {"_id": "global"},
+            {
+                "$set": {
+                    "built": self.built,
+                    "tracks_total": self.tracks_total,
+                    "plays_total": self.plays_total,
+                    "boards": {
+                        name: [list(entry) for entry in board.top(board.size)]
+                        for name, board in self.boards.items()
+                    },
+                }
+            },
+            upsert=True,
+        )
+
+    async def restore(self):
+        snapshot = await leaderboarddb.find_one({"_id": "global"})
+        if not snapshot or time.time() - snapshot["built"] > self.max_age:
+            return await self.rebuild()
+        for name, entries in snapshot["boards"].items():
+            if name in self.boards:
+                self.boards[name].load(entries)
+        self.tracks_total = snapshot["tracks_total"]
+        self.plays_total = snapshot["plays_total"]
+        self.built = snapshot["built"]
+
+    async def run(self):
+        try:
+            await self.restore()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to load leaderboards: {e}")
+        while not await asyncio.sleep(SNAPSHOT_INTERVAL):
+            try:
+                await self.rebuild(force=False)
+                # Workers of a sharded bot share the snapshot, the first one writes it.
+                if config.SHARD_ID in (None, 0):
+                    await self.snapshot()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to refresh leaderboards: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def _top(self, name: str, limit: int) -> list[tuple]:
+        await self.rebuild(force=False)
+        return self.boards[name].top(limit)
+
+    async def tracks(self, limit: int = 10) -> dict:
+        """Same shape as get_global_tops."""
+        return {
+            vidid: {"spot": spot, "title": title}
+            for vidid, spot, title in await self._top("tracks", limit)
+        }
+
+    async def chats(self, limit: int = 10) -> dict:
+        return {chat_id: spot for chat_id, spot, _ in await self._top("chats", limit)}
+
+    async def users(self, limit: int = 10) -> dict:
+        return {user_id: spot for user_id, spot, _ in await self._top("users", limit)}
+
+    async def totals(self) -> tuple:
+        await self.rebuild(force=False)
+        return self.tracks_total, self.plays_total
+
+
+play_stats = PlayStats(config.STATS_FLUSH_INTERVAL)
+leaderboards = Leaderboards(LEADERBOARD_SIZE, config.LEADERBOARD_MAX_AGE)
@@ -7,19 +7,18 @@
 #
 # All rights reserved.
 
-import aiohttp
+from YukkiMusic.core.http import http
 
 BASE = "https://batbin.me/"
 
 
 async def post(url: str, *args, **kwargs):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, *args, **kwargs) as resp:
-            try:
-                data = await resp.json()
-            except Exception:
-                data = await resp.text()
-        return data
+    resp = await http.get().post(url, *args, **kwargs)
+    try:
+        data = resp.json()
+    except Exception:
+        data = resp.text
+    return data
 
 
 async def Yukkibin(text):
@@ -7,25 +7,17 @@
 #
 # All rights reserved.
 
-import os
-
 from config import autoclean
+from YukkiMusic.core.mediacache import media_cache
 
 
 async def auto_clean(popped):
     try:
         rem = popped["file"]
         autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if (
-                "vid_" not in rem
-                or "live_" not in rem
-                or "index_" not in rem
-            ):
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+    except:
+        pass
+    try:
+        media_cache.enforce()
     except:
         pass
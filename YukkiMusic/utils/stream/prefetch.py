@@ -0,0 +1,94 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import os
+from typing import Optional
+
+import config
+from YukkiMusic import LOGGER, YouTube
+from YukkiMusic.misc import db
+
+
+class Prefetcher:
+    """Downloads the next queued tracks of a chat while the current one plays.
+
+    The finished path is stored on the queue entry itself, so it follows the
+    entry through shuffles and is picked up with ``take`` when it starts.
+    """
+
+    def __init__(self, depth: int, concurrency: int):
+        self.depth = depth
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: dict[int, dict[tuple, asyncio.Task]] = {}
+
+    @staticmethod
+    def _key(entry: dict) -> tuple:
+        return entry["vidid"], str(entry["streamtype"])
+
+    def schedule(self, chat_id: int):
+        """Start fetching the upcoming entries and drop work for ones that left the window."""
+        if self.depth < 1:
+            return
+        queue = db.get(chat_id) or []
+        wanted = {}
+        for entry in queue[1 : 1 + self.depth]:
+            if "vid_" in str(entry.get("file")) and "prefetched" not in entry:
+                wanted[self._key(entry)] = entry
+        tasks = self._tasks.setdefault(chat_id, {})
+        for key in list(tasks):
+            if key not in wanted:
+                tasks.pop(key).cancel()
+        for key, entry in wanted.items():
+            if key not in tasks:
+                task = asyncio.create_task(self._fetch(chat_id, key, entry))
+                tasks[key] = task
+        if not tasks:
+            self._tasks.pop(chat_id, None)
+
+    def cancel(self, chat_id: int):
+        for task in self._tasks.pop(chat_id, {}).values():
+            task.cancel()
+
+    async def _fetch(self, chat_id: int, key: tuple, entry: dict):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                file_path, direct = await YouTube.download(
+                    entry["vidid"],
+                    None,
+                    videoid=True,
+                    video=True if key[1] == "video" else False,
+                )
+            # Stream URLs expire and are already cached by YouTube.resolve_stream.
+            if direct and file_path:
+                entry["prefetched"] = file_path
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Prefetch of {key[0]} for {chat_id} failed: {e}"
+            )
+        finally:
+            tasks = self._tasks.get(chat_id, {})
+            if tasks.get(key) is asyncio.current_task():
+                del tasks[key]
+
+    @staticmethod
+    def take(entry: dict) -> Optional[tuple]:
+        """Return ``(file_path, direct)`` if the entry was prefetched and is still on disk."""
+        file_path = entry.pop("prefetched", None)
+        if file_path and os.path.exists(file_path):
+            return file_path, True
+        return None
+
+
+prefetcher = Prefetcher(config.PREFETCH_DEPTH, config.PREFETCH_CONCURRENCY)
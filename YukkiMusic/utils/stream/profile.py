@@ -0,0 +1,185 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import psutil
+from pytgcalls import StreamType
+from pytgcalls.types.input_stream import (AudioParameters, AudioPiped,
+                                          AudioVideoPiped, VideoParameters)
+from pytgcalls.types.input_stream.quality import (HighQualityAudio,
+                                                  HighQualityVideo,
+                                                  LowQualityAudio,
+                                                  LowQualityVideo,
+                                                  MediumQualityAudio,
+                                                  MediumQualityVideo)
+
+import config
+from YukkiMusic import LOGGER
+from YukkiMusic.utils.database import get_audio_bitrate, get_video_bitrate
+
+from .transcode import transcodes
+
+AUDIO_QUALITIES = [HighQualityAudio, MediumQualityAudio, LowQualityAudio]
+VIDEO_QUALITIES = [HighQualityVideo, MediumQualityVideo, LowQualityVideo]
+
+
+class _ProbeOnce:
+    """Keeps the ffprobe result so a stream probed ahead of time is not probed again on swap."""
+
+    probed = False
+
+    async def check_pipe(self):
+        if not self.probed:
+            await super().check_pipe()
+            self.probed = True
+
+
+class ProbedAudioPiped(_ProbeOnce, AudioPiped):
+    pass
+
+
+class ProbedAudioVideoPiped(_ProbeOnce, AudioVideoPiped):
+    pass
+
+
+def _lower(params, qualities: list, steps: int):
+    for index, quality in enumerate(qualities):
+        if type(params) is quality:
+            return qualities[min(index + steps, len(qualities) - 1)]()
+    return params
+
+
+@dataclass
+class StreamProfile:
+    audio: AudioParameters
+    video: VideoParameters
+    level: int
+    stream_type: object
+    ffmpeg: str = ""
+    seek_template: str = "-ss {start} -to {end}"
+    fade: int = 0
+
+    def build(
+        self,
+        link: str,
+        video: Union[bool, str] = None,
+        seek: Optional[tuple] = None,
+        duration: Optional[int] = None,
+    ) -> Union[AudioPiped, AudioVideoPiped]:
+        parts = [self.ffmpeg]
+        if seek:
+            parts.append(self.seek_template.format(start=seek[0], end=seek[1]))
+        elif self.fade and not video and duration and duration > 4 * self.fade:
+            # py-tgcalls puts parameters before -i unless they follow -atmid,
+            # and the video pipeline gets the same ones, so only audio fades.
+            parts.append(
+                f"-atmid -af afade=t=in:d={self.fade},"
+                f"afade=t=out:st={duration - self.fade}:d={self.fade}"
+            )
+        cached = None if video else transcodes.lookup(link, self.audio.bitrate)
+        if cached:
+            parts.insert(0, transcodes.input_options(self.audio.bitrate))
+        ffmpeg = " ".join(part for part in parts if part)
+        if video:
+            return ProbedAudioVideoPiped(
+                link,
+                audio_parameters=self.audio,
+                video_parameters=self.video,
+                additional_ffmpeg_parameters=ffmpeg,
+            )
+        stream = ProbedAudioPiped(
+            cached or link,
+            audio_parameters=self.audio,
+            additional_ffmpeg_parameters=ffmpeg,
+        )
+        # ffprobe cannot detect headerless PCM.
+        stream.probed = bool(cached)
+        return stream
+
+class StreamProfiles:
+    """Per-chat stream settings resolved once and reused on every track change.
+
+    In adaptive mode every profile is stepped down one quality level (up to
+    two) while the host is above the CPU or ffmpeg process threshold. Only
+    streams started after the change pick up the new level.
+    """
+
+    def __init__(self, cpu_threshold: float, ffmpeg_threshold: int):
+        self.cpu_threshold = cpu_threshold
+        self.ffmpeg_threshold = ffmpeg_threshold
+        self.level = 0
+        self._profiles: dict[int, StreamProfile] = {}
+
+    async def get(self, chat_id: int) -> StreamProfile:
+        profile = self._profiles.get(chat_id)
+        if profile is None or profile.level != self.level:
+            profile = self._profiles[chat_id] = StreamProfile(
+                audio=_lower(
+                    await get_audio_bitrate(chat_id),
+                    AUDIO_QUALITIES,
+                    self.level,
+                ),
+                video=_lower(
+                    await get_video_bitrate(chat_id),
+                    VIDEO_QUALITIES,
+                    self.level,
+                ),
+                level=self.level,
+                stream_type=StreamType().pulse_stream,
+                fade=config.TRANSITION_FADE,
+            )
+        return profile
+
+    def invalidate(self, chat_id: int):
+        self._profiles.pop(chat_id, None)
+
+    @staticmethod
+    def ffmpeg_processes() -> int:
+        count = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if "ffmpeg" in child.name():
+                    count += 1
+            except psutil.Error:
+                continue
+        return count
+
+    def update_load(self) -> int:
+        cpu = psutil.cpu_percent(interval=None)
+        processes = self.ffmpeg_processes()
+        level = self.level
+        if cpu > self.cpu_threshold or processes > self.ffmpeg_threshold:
+            level = min(level + 1, len(AUDIO_QUALITIES) - 1)
+        elif (
+            cpu < self.cpu_threshold * 0.7
+            and processes < self.ffmpeg_threshold * 0.7
+        ):
+            level = max(level - 1, 0)
+        if level != self.level:
+            LOGGER(__name__).info(
+                f"Stream quality level {self.level} -> {level} (CPU {cpu}%, {processes} ffmpeg processes)"
+            )
+            self.level = level
+        return level
+
+    async def monitor(self, interval: float = 30):
+        psutil.cpu_percent(interval=None)
+        while not await asyncio.sleep(interval):
+            try:
+                self.update_load()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to sample host load: {e}")
+
+
+stream_profiles = StreamProfiles(
+    config.ADAPTIVE_CPU_THRESHOLD, config.ADAPTIVE_FFMPEG_THRESHOLD
+)
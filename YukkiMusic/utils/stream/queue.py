@@ -9,9 +9,12 @@
 
 from typing import Union
 
-from config import autoclean, chatstats, userstats
+from config import autoclean
 from config.config import time_to_seconds
+from YukkiMusic.core.mediacache import media_cache
 from YukkiMusic.misc import db
+from YukkiMusic.utils.database import play_stats
+from YukkiMusic.utils.stream.prefetch import prefetcher
 
 
 async def put_queue(
@@ -51,15 +54,11 @@ async def put_queue(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
+    prefetcher.schedule(chat_id)
     autoclean.append(file)
-    vidid = "telegram" if vidid == "soundcloud" else vidid
-    to_append = {"vidid": vidid, "title": title}
-    if chat_id not in chatstats:
-        chatstats[chat_id] = []
-    chatstats[chat_id].append(to_append)
-    if user_id not in userstats:
-        userstats[user_id] = []
-    userstats[user_id].append(to_append)
+    # Telegram and SoundCloud files land in the downloads folder too.
+    media_cache.register(file)
+    play_stats.record(chat_id, user_id, vidid, title)
     return
 
 
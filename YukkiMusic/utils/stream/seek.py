@@ -0,0 +1,108 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from YukkiMusic import YouTube
+from YukkiMusic.core.keyframes import keyframes
+from YukkiMusic.misc import db
+
+COALESCE_DELAY = 0.7
+SOURCE_TTL = 50 * 60
+
+
+class Seeker:
+    """Seeks the playing track of a chat from the source it is already playing.
+
+    The file or URL handed to the call is remembered when a track starts, so
+    a seek does not resolve the track again. Seeks that arrive within
+    ``delay`` of each other are merged into one stream restart at the last
+    requested position.
+    """
+
+    def __init__(self, delay: float, source_ttl: float):
+        self.delay = delay
+        self.source_ttl = source_ttl
+        self._sources: dict[int, tuple[str, float]] = {}
+        self._targets: dict[int, tuple[dict, float]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def remember(self, chat_id: int, link: str):
+        self._sources[chat_id] = (str(link), time.time())
+
+    def forget(self, chat_id: int):
+        self._sources.pop(chat_id, None)
+        self._targets.pop(chat_id, None)
+
+    def position(self, chat_id: int) -> int:
+        """Seconds played, counting a seek that is still waiting to run."""
+        playing = db.get(chat_id)
+        target = self._targets.get(chat_id)
+        if target and playing and target[0] is playing[0]:
+            return int(target[1])
+        return int(playing[0]["played"]) if playing else 0
+
+    async def source(self, chat_id: int, entry: dict) -> Optional[str]:
+        link, since = self._sources.get(chat_id, (None, 0))
+        if link:
+            if link.startswith("http"):
+                # Resolved stream URLs expire after a few hours.
+                if time.time() - since < self.source_ttl:
+                    return link
+            elif os.path.exists(link):
+                return link
+        if "vid_" in entry["file"]:
+            n, link = await YouTube.video(entry["vidid"], True)
+            if n == 0:
+                return None
+        else:
+            link = entry["file"]
+        self.remember(chat_id, link)
+        return link
+
+    async def seek(self, chat_id: int, position: float) -> float:
+        """Seek the current track to ``position`` seconds and return where it landed."""
+        self._targets[chat_id] = (db[chat_id][0], position)
+        task = self._tasks.get(chat_id)
+        if task is None:
+            task = self._tasks[chat_id] = asyncio.create_task(self._run(chat_id))
+        return await asyncio.shield(task)
+
+    async def _run(self, chat_id: int) -> float:
+        from YukkiMusic.core.call import Yukki
+
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            del self._tasks[chat_id]
+        target = self._targets.pop(chat_id, None)
+        playing = db.get(chat_id)
+        if not target or not playing or target[0] is not playing[0]:
+            raise Exception("The track changed before the seek")
+        entry, position = target
+        link = await self.source(chat_id, entry)
+        if link is None:
+            raise Exception("Could not resolve the track source")
+        if str(entry["streamtype"]) == "video" and not link.startswith("http"):
+            position = keyframes.snap(link, position)
+        await Yukki.seek_stream(
+            chat_id,
+            link,
+            f"{position:.3f}",
+            entry["dur"],
+            entry["streamtype"],
+        )
+        entry["played"] = int(position)
+        return position
+
+
+seeker = Seeker(COALESCE_DELAY, SOURCE_TTL)
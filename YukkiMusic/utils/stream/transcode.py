@@ -0,0 +1,109 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import os
+from typing import Optional
+
+import config
+from YukkiMusic import LOGGER
+from YukkiMusic.core.mediacache import media_cache
+
+CONCURRENCY = 2
+
+
+class TranscodeCache:
+    """Decoded copies of downloaded tracks in the raw format py-tgcalls streams.
+
+    py-tgcalls decodes its input to mono s16le PCM at the audio bitrate on
+    every play. The first play of a download at a bitrate writes that PCM next
+    to it as ``<name>.<bitrate>.pcm``; later plays read it back with matching
+    input options, so ffmpeg only copies samples. The copies live in the
+    downloads folder and are evicted by the media cache with their source.
+    """
+
+    def __init__(self, enabled: bool, concurrency: int):
+        self.enabled = enabled
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def input_options(bitrate: int) -> str:
+        return f"-f s16le -ac 1 -ar {bitrate}"
+
+    def path(self, source: str, bitrate: int) -> Optional[str]:
+        source = os.path.realpath(str(source))
+        if os.path.dirname(source) != os.path.realpath(media_cache.directory):
+            return None
+        name = os.path.basename(source)
+        if name.endswith(".pcm"):
+            return None
+        return os.path.join(
+            media_cache.directory, f"{name.split('.', 1)[0]}.{bitrate}.pcm"
+        )
+
+    def lookup(self, source: str, bitrate: int) -> Optional[str]:
+        """Return the decoded copy of ``source``, queueing its transcode if there is none yet."""
+        if not self.enabled:
+            return None
+        path = self.path(source, bitrate)
+        if path is None or not os.path.isfile(source):
+            return None
+        if os.path.isfile(path):
+            media_cache.touch(path)
+            return path
+        if path not in self._tasks:
+            self._tasks[path] = asyncio.create_task(
+                self._transcode(source, bitrate, path)
+            )
+        return None
+
+    async def _transcode(self, source: str, bitrate: int, path: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        tmp = os.path.join(
+            media_cache.directory, f".tmp-{os.path.basename(path)}"
+        )
+        try:
+            async with self._semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    "ffmpeg",
+                    "-y",
+                    "-v",
+                    "error",
+                    "-i",
+                    source,
+                    *self.input_options(bitrate).split(),
+                    tmp,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    _, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    process.kill()
+                    raise
+            if process.returncode != 0:
+                raise Exception(stderr.decode(errors="ignore").strip())
+            os.replace(tmp, path)
+            media_cache.touch(path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER(__name__).warning(f"Transcoding {source} failed: {e}")
+        finally:
+            self._tasks.pop(path, None)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+transcodes = TranscodeCache(config.TRANSCODE_CACHE == str(True), CONCURRENCY)
@@ -0,0 +1,121 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import os
+from typing import Optional, Union
+
+from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
+
+import config
+from YukkiMusic import LOGGER
+from YukkiMusic.misc import db
+from YukkiMusic.utils.database import get_loop
+
+from .profile import stream_profiles
+
+WARM_BYTES = 1024 * 1024
+
+
+def _warm(path: str):
+    with open(path, "rb") as f:
+        f.read(WARM_BYTES)
+
+
+class Transitions:
+    """Prepares the next queued track shortly before the current one ends.
+
+    The next entry's file is read into the page cache and probed with ffprobe
+    ahead of time, so ``Call.change_stream`` only has to hand the ready stream
+    to py-tgcalls. At most ``limit`` tracks are prepared at once; chats over
+    the cap simply switch the usual way.
+    """
+
+    def __init__(self, lead: int, limit: int):
+        self.lead = lead
+        self.limit = limit
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._ready: dict[int, tuple] = {}
+        self._attempted: dict[int, dict] = {}
+
+    @staticmethod
+    def _source(entry: dict) -> Optional[str]:
+        file = str(entry.get("file"))
+        if "live_" in file or "index_" in file:
+            return None
+        if "vid_" in file:
+            return entry.get("prefetched")
+        return file if os.path.exists(file) else None
+
+    def prepare(self, chat_id: int, remaining: int):
+        """Called every second of playback with the seconds left in the current track."""
+        if self.lead < 1 or remaining > self.lead:
+            return
+        queue = db.get(chat_id) or []
+        if len(queue) < 2 or self._attempted.get(chat_id) is queue[1]:
+            return
+        # Downloads that are still running are retried on the next tick.
+        path = self._source(queue[1])
+        if path is None:
+            return
+        if len(self._tasks) >= self.limit:
+            return
+        self._attempted[chat_id] = queue[1]
+        self._tasks[chat_id] = asyncio.create_task(
+            self._prepare(chat_id, queue[1], path)
+        )
+
+    async def _prepare(self, chat_id: int, entry: dict, path: str):
+        try:
+            if await get_loop(chat_id) != 0:
+                return
+            await asyncio.get_running_loop().run_in_executor(None, _warm, path)
+            profile = await stream_profiles.get(chat_id)
+            stream = profile.build(
+                path,
+                str(entry["streamtype"]) == "video",
+                duration=int(entry["seconds"]),
+            )
+            await stream.check_pipe()
+            self._ready[chat_id] = (entry, path, profile, stream)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Preparing the next track for {chat_id} failed: {e}"
+            )
+        finally:
+            if self._tasks.get(chat_id) is asyncio.current_task():
+                del self._tasks[chat_id]
+
+    async def take(
+        self, chat_id: int, entry: dict
+    ) -> Optional[Union[AudioPiped, AudioVideoPiped]]:
+        """Return the prepared stream if it is for ``entry`` and still usable."""
+        ready = self._ready.pop(chat_id, None)
+        if not ready:
+            return None
+        prepared, path, profile, stream = ready
+        if (
+            prepared is not entry
+            or profile is not await stream_profiles.get(chat_id)
+            or not os.path.exists(path)
+        ):
+            return None
+        return stream
+
+    def cancel(self, chat_id: int):
+        self._ready.pop(chat_id, None)
+        self._attempted.pop(chat_id, None)
+        task = self._tasks.pop(chat_id, None)
+        if task:
+            task.cancel()
+
+
+transitions = Transitions(config.TRANSITION_LEAD, config.TRANSITION_MAX_PREPARED)
@@ -9,7 +9,7 @@
 
 import re
 import sys
-from os import getenv
+from os import environ, getenv
 
 from dotenv import load_dotenv
 from pyrogram import filters
@@ -120,6 +120,12 @@ CLEANMODE_DELETE_MINS = int(
     getenv("CLEANMODE_MINS", "5")
 )  # Remember to give value in Seconds
 
+# Seconds between writes of the play counters behind top tracks to the database.
+STATS_FLUSH_INTERVAL = int(getenv("STATS_FLUSH_INTERVAL", "30"))
+
+# Maximum age in seconds of the global top tracks, chats and users before they are rebuilt from the database.
+LEADERBOARD_MAX_AGE = int(getenv("LEADERBOARD_MAX_AGE", "900"))
+
 
 # Telegram audio  and video file size limit
 
@@ -137,6 +143,97 @@ TG_VIDEO_FILESIZE_LIMIT = int(
 # Refer to https://i.postimg.cc/Bbg3LQTG/image.png
 SET_CMDS = getenv("SET_CMDS", True)
 
+# Maximum size (in bytes) of the downloads folder before least recently played files are removed.
+MEDIA_CACHE_SIZE = int(getenv("MEDIA_CACHE_SIZE", "2147483648"))
+
+# Which files to remove first when the downloads folder is full: lru (least recently played) or lfu (least played).
+MEDIA_CACHE_POLICY = getenv("MEDIA_CACHE_POLICY", "lru")
+
+# Set it True to keep a decoded copy of played downloads in the downloads folder, so replays skip decoding.
+TRANSCODE_CACHE = getenv("TRANSCODE_CACHE", None)
+
+# Number of background yt-dlp worker processes kept warm for extracting and downloading.
+YTDL_WORKERS = int(getenv("YTDL_WORKERS", "2"))
+
+# Time limit (in seconds) for a single yt-dlp lookup and for a single yt-dlp download.
+YTDL_JOB_TIMEOUT = int(getenv("YTDL_JOB_TIMEOUT", "60"))
+YTDL_DOWNLOAD_TIMEOUT = int(getenv("YTDL_DOWNLOAD_TIMEOUT", "900"))
+
+# How many upcoming queued tracks to download in the background while the current one plays (0 disables it).
+PREFETCH_DEPTH = int(getenv("PREFETCH_DEPTH", "1"))
+
+# Maximum number of background prefetch downloads running at once across all chats.
+PREFETCH_CONCURRENCY = int(getenv("PREFETCH_CONCURRENCY", "3"))
+
+# How long (in seconds) fetched YouTube metadata is reused before searching again.
+METADATA_CACHE_TTL = int(getenv("METADATA_CACHE_TTL", "21600"))
+
+# Maximum number of YouTube metadata entries kept in memory.
+METADATA_CACHE_SIZE = int(getenv("METADATA_CACHE_SIZE", "2000"))
+
+# Set it True to keep the YouTube metadata cache on disk across restarts.
+METADATA_CACHE_PERSIST = getenv("METADATA_CACHE_PERSIST", None)
+
+# How long (in seconds) and how many chat settings are kept in memory before reading them from the database again.
+SETTINGS_CACHE_TTL = int(getenv("SETTINGS_CACHE_TTL", "600"))
+SETTINGS_CACHE_SIZE = int(getenv("SETTINGS_CACHE_SIZE", "20000"))
+
+# Chats that used the bot in the last this many hours get their settings loaded at startup (0 disables it).
+SETTINGS_PREFETCH_HOURS = int(getenv("SETTINGS_PREFETCH_HOURS", "24"))
+
+# Number of YouTube searches run at once when resolving Spotify, Apple and Resso playlists.
+SEARCH_CONCURRENCY = int(getenv("SEARCH_CONCURRENCY", "5"))
+
+# How long (in seconds) and how many search queries are remembered on disk with the video they resolved to.
+SEARCH_MEMO_TTL = int(getenv("SEARCH_MEMO_TTL", "604800"))
+SEARCH_MEMO_SIZE = int(getenv("SEARCH_MEMO_SIZE", "10000"))
+
+# Connection pool limits shared by every outgoing HTTP request of the bot, in total and per remote host.
+HTTP_MAX_CONNECTIONS = int(getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_PER_HOST = int(getenv("HTTP_MAX_PER_HOST", "10"))
+
+# Default timeout (in seconds) and connection retries for outgoing HTTP requests.
+HTTP_TIMEOUT = int(getenv("HTTP_TIMEOUT", "30"))
+HTTP_RETRIES = int(getenv("HTTP_RETRIES", "2"))
+
+# How long (in seconds) resolved host names are reused before asking DNS again.
+HTTP_DNS_TTL = int(getenv("HTTP_DNS_TTL", "300"))
+
+# Assistants whose voice chat ping (in ms) goes above this are treated as unhealthy and get no new chats.
+ASSISTANT_MAX_PING = int(getenv("ASSISTANT_MAX_PING", "1000"))
+
+# How often (in seconds) assistant load and health are checked and idle chats moved off unhealthy assistants.
+ASSISTANT_MONITOR_INTERVAL = int(getenv("ASSISTANT_MONITOR_INTERVAL", "60"))
+
+# Time limit (in seconds) for the bot and each assistant to connect on startup. Assistants that miss it are skipped.
+STARTUP_TIMEOUT = int(getenv("STARTUP_TIMEOUT", "60"))
+
+# How long (in seconds) an assistant is remembered as a member of a chat, so playing there again skips the membership check.
+ASSISTANT_MEMBERSHIP_TTL = int(getenv("ASSISTANT_MEMBERSHIP_TTL", "3600"))
+
+# Set it True to lower the stream quality of new tracks while the host is overloaded.
+ADAPTIVE_BITRATE = getenv("ADAPTIVE_BITRATE", None)
+
+# CPU usage (in percent) and number of running ffmpeg processes above which adaptive bitrate steps quality down.
+ADAPTIVE_CPU_THRESHOLD = int(getenv("ADAPTIVE_CPU_THRESHOLD", "85"))
+ADAPTIVE_FFMPEG_THRESHOLD = int(getenv("ADAPTIVE_FFMPEG_THRESHOLD", "40"))
+
+# Seconds before a track ends to open and probe the next queued one, so the switch is near instant (0 disables it).
+TRANSITION_LEAD = int(getenv("TRANSITION_LEAD", "10"))
+
+# Maximum number of upcoming tracks being prepared at once across all chats.
+TRANSITION_MAX_PREPARED = int(getenv("TRANSITION_MAX_PREPARED", "5"))
+
+# Seconds to fade audio in and out at track boundaries (0 disables it).
+TRANSITION_FADE = int(getenv("TRANSITION_FADE", "0"))
+
+# Set it above 1 to spread chats and assistants over that many worker processes, one per CPU core is a good start.
+SHARDS = int(getenv("SHARDS", "1"))
+
+# Set automatically for the worker processes of sharded mode, don't set it yourself.
+SHARD_ID = getenv("SHARD_ID", None)
+SHARD_ID = None if SHARD_ID is None else int(SHARD_ID)
+
 # You'll need a Pyrogram String Session for these vars. Generate String from our session generator bot @YukkiStringBot
 STRING1 = getenv("STRING_SESSION", None)
 STRING2 = getenv("STRING_SESSION2", None)
@@ -144,6 +241,15 @@ STRING3 = getenv("STRING_SESSION3", None)
 STRING4 = getenv("STRING_SESSION4", None)
 STRING5 = getenv("STRING_SESSION5", None)
 
+# Any number of further assistants can be added as STRING_SESSION6, STRING_SESSION7 and so on.
+EXTRA_SESSIONS = [
+    int(key[14:]) for key in environ if re.fullmatch(r"STRING_SESSION\d+", key)
+]
+STRING_SESSIONS = [STRING1, STRING2, STRING3, STRING4, STRING5] + [
+    getenv(f"STRING_SESSION{num}", None)
+    for num in range(6, max(EXTRA_SESSIONS, default=0) + 1)
+]
+
 
 #  __     ___    _ _  ___  _______   __  __ _    _  _____ _____ _____   ____   ____ _______
 #  \ \   / / |  | | |/ / |/ /_   _| |  \/  | |  | |/ ____|_   _/ ____| |  _ \ / __ \__   __|
@@ -160,8 +266,6 @@ LOG = 2
 LOG_FILE_NAME = "Yukkilogs.txt"
 adminlist = {}
 lyrical = {}
-chatstats = {}
-userstats = {}
 clean = {}
 
 autoclean = []
@@ -179,6 +283,19 @@ API_KEY = getenv("API_KEY", "")
 # For - downloads
 DOWNLOADS_DIR = "downloads"
 
+# Every shard worker keeps its own assistants, downloads folder and share of the media cache.
+SHARDS = max(1, min(SHARDS, len([session for session in STRING_SESSIONS if session])))
+if SHARDS > 1 and SHARD_ID is not None:
+    owned = [num for num, session in enumerate(STRING_SESSIONS) if session][
+        SHARD_ID::SHARDS
+    ]
+    STRING_SESSIONS = [
+        session if num in owned else None
+        for num, session in enumerate(STRING_SESSIONS)
+    ]
+    DOWNLOADS_DIR = f"downloads/shard{SHARD_ID}"
+    MEDIA_CACHE_SIZE //= SHARDS
+
 
 # Images
 START_IMG_URL = getenv("START_IMG_URL", None)
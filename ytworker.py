@@ -0,0 +1,84 @@
+#
+# Copyright (C) 2021-2022 by TeamYukki@Github, < https://github.com/TeamYukki >.
+#
+# This file is part of < https://github.com/TeamYukki/YukkiMusicBot > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TeamYukki/YukkiMusicBot/blob/master/LICENSE >
+#
+# All rights reserved.
+
+# Jobs executed inside the yt-dlp worker processes of YukkiMusic.core.ytdl.
+# This lives outside the YukkiMusic package on purpose: importing that
+# package starts the bot, which must never happen inside a worker.
+
+import json
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+import yt_dlp
+
+MAX_INSTANCES = 8
+
+_instances: "OrderedDict[str, yt_dlp.YoutubeDL]" = OrderedDict()
+
+
+def _ydl(opts: dict[str, Any]) -> yt_dlp.YoutubeDL:
+    key = json.dumps(opts, sort_keys=True, default=str)
+    ydl = _instances.get(key)
+    if ydl is None:
+        ydl = _instances[key] = yt_dlp.YoutubeDL(opts)
+        while len(_instances) > MAX_INSTANCES:
+            _, old = _instances.popitem(last=False)
+            old.close()
+    _instances.move_to_end(key)
+    return ydl
+
+
+def warm():
+    _ydl({"quiet": True, "no_warnings": True}).get_info_extractor("Youtube")
+
+
+def ping() -> int:
+    return os.getpid()
+
+
+def extract_info(link: str, opts: dict[str, Any]) -> dict[str, Any]:
+    ydl = _ydl(opts)
+    return ydl.sanitize_info(ydl.extract_info(link, download=False))
+
+
+def stream_url(link: str, opts: dict[str, Any]) -> str:
+    info = _ydl(opts).extract_info(link, download=False)
+    if info.get("requested_formats"):
+        return info["requested_formats"][0]["url"]
+    return info["url"]
+
+
+def flat_playlist(link: str, limit: int, opts: dict[str, Any]) -> list[str]:
+    opts = {**opts, "extract_flat": True, "playlistend": limit, "ignoreerrors": True}
+    info = _ydl(opts).extract_info(link, download=False)
+    return [entry["id"] for entry in info.get("entries") or [] if entry and entry.get("id")]
+
+
+def download(link: str, opts: dict[str, Any], directory: str, filename: Optional[str] = None, ext: Optional[str] = None) -> str:
+    """Download into a private temp dir and rename into the downloads directory only once complete."""
+    ydl = _ydl(opts)
+    tmpdir = os.path.join(directory, f".tmp-{uuid.uuid4().hex}")
+    ydl.params["outtmpl"] = {"default": os.path.join(tmpdir, f"{filename or '%(id)s'}.%(ext)s")}
+    try:
+        info = ydl.extract_info(link, download=False)
+        name = f"{filename or info['id']}.{ext or info['ext']}"
+        target = os.path.join(directory, name)
+        if not filename and os.path.exists(target):
+            return target
+        ydl.process_ie_result(info, download=True)
+        produced = os.path.join(tmpdir, name)
+        if not os.path.exists(produced):
+            produced = os.path.join(tmpdir, os.listdir(tmpdir)[0])
+        os.replace(produced, target)
+        return target
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)